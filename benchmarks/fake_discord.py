@@ -0,0 +1,82 @@
+import asyncio
+import itertools
+import time
+from collections import Counter
+from typing import Optional, Dict, List
+
+
+class FakeDiscord:
+    """Shared latency and counters for the fake guild and its channels"""
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.requests: Counter = Counter()
+        # Completion times of channel sends, for delivery latency
+        self.sent_at: List[float] = []
+        self._ids = itertools.count(10**17)
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    async def call(self, route: str):
+        """Count a REST call and wait out its latency"""
+        self.requests[route] += 1
+        await asyncio.sleep(self.latency)
+
+    def reset(self):
+        self.requests.clear()
+        self.sent_at.clear()
+
+
+class FakeMember:
+    def __init__(self, member_id: int):
+        self.id = member_id
+        self.mention = f"<@{member_id}>"
+
+
+class FakeChannel:
+    def __init__(
+        self, discord: FakeDiscord, name: str, channel_id: Optional[int] = None
+    ):
+        self.discord = discord
+        self.name = name
+        self.id = channel_id or discord.next_id()
+
+    async def send(self, content=None, embed=None):
+        await self.discord.call("send_message")
+        self.discord.sent_at.append(time.perf_counter())
+
+    async def set_permissions(self, target, **permissions):
+        await self.discord.call("edit_channel_permissions")
+
+
+class FakeGuild:
+    """Just enough of discord.Guild for GroupService and the daily fan-out"""
+
+    def __init__(self, discord: FakeDiscord, guild_id: int = 1, shard_id: int = 0):
+        self.discord = discord
+        self.id = guild_id
+        self.shard_id = shard_id
+        self.categories: List[FakeChannel] = []
+        self.channels: Dict[int, FakeChannel] = {}
+
+    def add_channel(self, channel_id: int) -> FakeChannel:
+        """Register an existing channel, e.g. one seeded in the database"""
+        channel = FakeChannel(self.discord, str(channel_id), channel_id)
+        self.channels[channel.id] = channel
+        return channel
+
+    def get_channel(self, channel_id: int) -> Optional[FakeChannel]:
+        return self.channels.get(channel_id)
+
+    async def create_category(self, name: str) -> FakeChannel:
+        await self.discord.call("create_channel")
+        category = FakeChannel(self.discord, name)
+        self.categories.append(category)
+        return category
+
+    async def create_text_channel(self, name: str, **options) -> FakeChannel:
+        await self.discord.call("create_channel")
+        channel = FakeChannel(self.discord, name)
+        self.channels[channel.id] = channel
+        return channel
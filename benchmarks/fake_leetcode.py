@@ -0,0 +1,119 @@
+import asyncio
+import random
+import re
+import zlib
+from collections import Counter
+from typing import Optional, Dict, Any, List
+from aiohttp import web
+import logging
+
+logger = logging.getLogger(__name__)
+
+OPERATION_NAME = re.compile(r"query\s+(\w+)")
+SUBMISSION_FIELD = re.compile(r"(\w+):\s*recentAcSubmissionList\(username:\s*\$(\w+)")
+
+
+class FakeLeetCodeServer:
+    """Local stand-in for the LeetCode GraphQL endpoint
+
+    Answers the queries LeetCodeService sends, after `latency` seconds, and
+    throttles `throttle_rate` of requests with a 429 and a Retry-After.
+    Whether a user solved a question is a stable hash of their username.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        throttle_rate: float = 0.0,
+        retry_after: float = 1.0,
+        solve_rate: float = 0.3,
+        host: str = "127.0.0.1",
+    ):
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.solve_rate = solve_rate
+        self.host = host
+        self.port: Optional[int] = None
+        # Slug and timestamp that solving users report an accepted submission for
+        self.solved_slug = "two-sum"
+        self.solved_timestamp = 0
+        self.requests: Counter = Counter()
+        self.throttled = 0
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/graphql"
+
+    async def start(self):
+        """Serve on a free port"""
+        app = web.Application(client_max_size=16 * 1024**2)
+        app.router.add_post("/graphql", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, 0)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        """Stop serving"""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def reset(self):
+        """Clear request counters between runs"""
+        self.requests.clear()
+        self.throttled = 0
+
+    def solves(self, username: str) -> bool:
+        """Whether a user has solved the current question"""
+        return zlib.crc32(username.encode()) % 10000 < self.solve_rate * 10000
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        query = payload["query"]
+        variables = payload.get("variables") or {}
+        match = OPERATION_NAME.search(query)
+        self.requests[match.group(1) if match else "anonymous"] += 1
+
+        await asyncio.sleep(self.latency)
+        if random.random() < self.throttle_rate:
+            self.throttled += 1
+            return web.Response(
+                status=429, headers={"Retry-After": str(self.retry_after)}
+            )
+
+        return web.json_response({"data": self._resolve(query, variables)})
+
+    def _resolve(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the data for the query types LeetCodeService sends"""
+        if "matchedUser" in query:
+            return {"matchedUser": {"username": variables["username"], "profile": {}}}
+
+        if "questionList" in query:
+            return {"questionList": {"total": 0, "questions": []}}
+
+        fields = SUBMISSION_FIELD.findall(query)
+        if fields:
+            return {
+                alias: self._submissions(variables[variable])
+                for alias, variable in fields
+            }
+
+        if "recentAcSubmissionList" in query:
+            return {"recentAcSubmissionList": self._submissions(variables["username"])}
+
+        return {}
+
+    def _submissions(self, username: str) -> List[Dict[str, Any]]:
+        if not self.solves(username):
+            return []
+        return [
+            {
+                "title": self.solved_slug,
+                "titleSlug": self.solved_slug,
+                "timestamp": str(self.solved_timestamp),
+            }
+        ]
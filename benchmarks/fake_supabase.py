@@ -0,0 +1,281 @@
+import asyncio
+import itertools
+from collections import Counter, defaultdict
+from typing import Optional, Dict, Any, List, Tuple
+from aiohttp import web
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (table, embedded table) -> (column on the embedded rows, column on the table, many)
+EMBEDS = {
+    ("daily_questions", "submissions"): ("question_id", "id", True),
+    ("group_members", "groups"): ("id", "group_id", False),
+}
+RESERVED_PARAMS = {"select", "order", "offset", "limit", "columns"}
+
+
+class FakeSupabaseServer:
+    """In-memory stand-in for the PostgREST API behind Supabase
+
+    Supports the filters, embeds, paging and RPCs DatabaseManager uses,
+    after `latency` seconds per request. Not a general PostgREST.
+    """
+
+    def __init__(self, latency: float = 0.01, host: str = "127.0.0.1"):
+        self.latency = latency
+        self.host = host
+        self.port: Optional[int] = None
+        self.tables: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.requests: Counter = Counter()
+        self._ids = defaultdict(lambda: itertools.count(1))
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        """Serve on a free port"""
+        app = web.Application(client_max_size=256 * 1024**2)
+        app.router.add_post("/rest/v1/rpc/{function}", self._handle_rpc)
+        app.router.add_route("*", "/rest/v1/{table}", self._handle_table)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, 0)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        """Stop serving"""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def reset(self):
+        """Drop all rows and counters between runs"""
+        self.tables.clear()
+        self.requests.clear()
+        self._ids.clear()
+
+    def insert(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert rows, filling ids and the group member count trigger"""
+        inserted = []
+        for row in rows:
+            row = dict(row)
+            if table != "users":
+                row.setdefault("id", next(self._ids[table]))
+            if table == "groups":
+                row.setdefault("channel_id", None)
+                row.setdefault("guild_id", None)
+                row.setdefault("member_count", 0)
+            if table == "group_members":
+                for group in self.tables["groups"]:
+                    if group["id"] == row["group_id"]:
+                        group["member_count"] += 1
+            self.tables[table].append(row)
+            inserted.append(row)
+        return inserted
+
+    async def _handle_table(self, request: web.Request) -> web.Response:
+        table = request.match_info["table"]
+        self.requests[f"{request.method} {table}"] += 1
+        await asyncio.sleep(self.latency)
+
+        if request.method == "POST":
+            body = await request.json()
+            rows = self.insert(table, body if isinstance(body, list) else [body])
+            return web.json_response(rows, status=201)
+
+        rows = self._filter(table, request.query)
+        if request.method == "PATCH":
+            changes = await request.json()
+            for row in rows:
+                row.update(changes)
+            return web.json_response(rows)
+
+        total = len(rows)
+        rows = self._order(rows, request.query.get("order"))
+        offset = int(request.query.get("offset", 0))
+        limit = request.query.get("limit")
+        rows = rows[offset : offset + int(limit) if limit else None]
+        rows = [
+            self._project(table, row, request.query.get("select", "*")) for row in rows
+        ]
+
+        headers = {}
+        if "count=" in request.headers.get("Prefer", ""):
+            headers["Content-Range"] = f"{offset}-{offset + len(rows) - 1}/{total}"
+        return web.json_response(rows, headers=headers)
+
+    async def _handle_rpc(self, request: web.Request) -> web.Response:
+        function = request.match_info["function"]
+        self.requests[f"RPC {function}"] += 1
+        await asyncio.sleep(self.latency)
+        params = await request.json()
+
+        if function == "record_results":
+            question_id = params["p_question_id"]
+            recorded = {
+                s["user_id"]
+                for s in self.tables["submissions"]
+                if s["question_id"] == question_id
+            }
+            new = [r for r in params["p_results"] if r["user_id"] not in recorded]
+            self.insert(
+                "submissions",
+                [
+                    {"user_id": r["user_id"], "question_id": question_id, **r}
+                    for r in new
+                ],
+            )
+            solved = {r["user_id"] for r in new if r["solved"]}
+            awarded = []
+            for user in self.tables["users"]:
+                if user["discord_id"] in solved:
+                    user["monthly_score"] += params["p_points"]
+                    user["weekly_score"] += params["p_points"]
+                    awarded.append({"discord_id": user["discord_id"]})
+            return web.json_response(awarded)
+
+        if function == "unscored_daily_questions":
+            users = len(self.tables["users"])
+            questions = [
+                q
+                for q in self.tables["daily_questions"]
+                if params["p_start"] <= q["sent_at"] < params["p_end"]
+                and sum(
+                    1 for s in self.tables["submissions"] if s["question_id"] == q["id"]
+                )
+                < users
+            ]
+            return web.json_response(sorted(questions, key=lambda q: q["sent_at"]))
+
+        if function == "claim_group_slot":
+            for group in sorted(self.tables["groups"], key=lambda g: g["id"]):
+                if (
+                    group["guild_id"] == params["p_guild_id"]
+                    and group["member_count"] < params["p_max_size"]
+                    and group["channel_id"] is not None
+                ):
+                    member = {
+                        "group_id": group["id"],
+                        "discord_id": params["p_discord_id"],
+                    }
+                    self.insert("group_members", [member])
+                    return web.json_response([group])
+            return web.json_response([])
+
+        return web.json_response(
+            {"message": f"Function {function} not faked"}, status=404
+        )
+
+    def _filter(self, table: str, query) -> List[Dict[str, Any]]:
+        filters = [
+            (column, *value.split(".", 1))
+            for column, value in query.items()
+            if column not in RESERVED_PARAMS
+        ]
+        rows = self.tables[table]
+        for column, operator, value in filters:
+            if (table, column) in EMBEDS:
+                rows = [r for r in rows if self._embed_matches(table, column, r, value)]
+            else:
+                rows = [r for r in rows if _compare(r.get(column), operator, value)]
+        return rows
+
+    def _embed(self, table: str, embedded: str, row: Dict[str, Any]):
+        remote, local, many = EMBEDS[(table, embedded)]
+        matches = [r for r in self.tables[embedded] if r[remote] == row[local]]
+        return matches if many else (matches[0] if matches else None)
+
+    def _embed_matches(self, table: str, embedded: str, row, value: str) -> bool:
+        found = self._embed(table, embedded, row)
+        return not found if value == "null" else bool(found)
+
+    def _project(self, table: str, row: Dict[str, Any], select: str) -> Dict[str, Any]:
+        projected = {}
+        for column, nested in _parse_select(select):
+            if column == "*":
+                projected.update(row)
+            elif nested is not None:
+                found = self._embed(table, column, row)
+                if isinstance(found, list):
+                    found = [self._pick(r, nested) for r in found]
+                elif found is not None:
+                    found = self._pick(found, nested)
+                projected[column] = found
+            else:
+                projected[column] = row.get(column)
+        return projected
+
+    @staticmethod
+    def _pick(row: Dict[str, Any], columns: str) -> Dict[str, Any]:
+        if columns.strip() == "*":
+            return dict(row)
+        return {c.strip(): row.get(c.strip()) for c in columns.split(",")}
+
+    @staticmethod
+    def _order(
+        rows: List[Dict[str, Any]], order: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        if not order:
+            return rows
+        # Apply the least significant key first, sorts are stable
+        for term in reversed(order.split(",")):
+            column, _, direction = term.partition(".")
+            rows = sorted(
+                rows,
+                key=lambda r: (r.get(column) is None, r.get(column)),
+                reverse=direction.startswith("desc"),
+            )
+        return rows
+
+
+def _parse_select(select: str) -> List[Tuple[str, Optional[str]]]:
+    """Split "*, submissions(id)" into [("*", None), ("submissions", "id")]"""
+    items, depth, current = [], 0, ""
+    for char in select + ",":
+        if char == "," and depth == 0:
+            if current.strip():
+                items.append(current.strip())
+            current = ""
+            continue
+        depth += {"(": 1, ")": -1}.get(char, 0)
+        current += char
+
+    parsed = []
+    for item in items:
+        name, _, rest = item.partition("(")
+        parsed.append((name.strip(), rest[:-1] if rest else None))
+    return parsed
+
+
+def _compare(actual: Any, operator: str, value: str) -> bool:
+    """Evaluate one PostgREST filter against a row value"""
+    if operator == "is":
+        return actual is None if value == "null" else str(actual).lower() == value
+    if actual is None:
+        return False
+    if isinstance(actual, bool):
+        expected = value == "true"
+    elif isinstance(actual, int):
+        expected = int(value)
+    else:
+        expected = value
+
+    if operator == "eq":
+        return actual == expected
+    if operator == "neq":
+        return actual != expected
+    if operator == "gt":
+        return actual > expected
+    if operator == "gte":
+        return actual >= expected
+    if operator == "lt":
+        return actual < expected
+    if operator == "lte":
+        return actual <= expected
+    if operator == "in":
+        return str(actual) in value.strip("()").split(",")
+    raise ValueError(f"Filter operator {operator} not faked")
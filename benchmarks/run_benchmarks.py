@@ -0,0 +1,380 @@
+"""End-to-end benchmarks for scoring, group assignment and the daily fan-out
+
+Runs the real services against local stand-ins for LeetCode, Supabase and
+Discord, so performance changes can be measured offline:
+
+    python -m benchmarks.run_benchmarks --users 100 1000 10000
+    python -m benchmarks.run_benchmarks --pipelines scoring --throttle-rate 0.05
+
+Latency is per LeetCode request for scoring, per join for group assignment
+and time to delivery per channel for the fan-out.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, asdict, field
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Dict, List
+
+from benchmarks.fake_discord import FakeDiscord, FakeGuild, FakeMember
+from benchmarks.fake_leetcode import FakeLeetCodeServer
+from benchmarks.fake_supabase import FakeSupabaseServer
+from src.bot.leetcode_bot import LeetCodeBot
+from src.database.database_manager import DatabaseManager
+from src.services.fanout_service import FanoutDispatcher
+from src.services.group_services import GroupService
+from src.services.http_client import HttpClient
+from src.services.leaderboard_cache import LeaderboardCache
+from src.services.leetcode_services import LeetCodeService
+from src.services.scoring_service import ScoringService
+from src.tasks.scheduled_tasks import ScheduledTasks
+
+logger = logging.getLogger(__name__)
+
+PIPELINES = ["scoring", "groups", "fanout"]
+
+
+@dataclass
+class BenchmarkResult:
+    """Outcome of one pipeline run at one user count"""
+
+    pipeline: str
+    users: int
+    seconds: float
+    items: int
+    p50: float
+    p99: float
+    requests: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        return self.items / self.seconds if self.seconds else 0.0
+
+
+class TimedLeetCodeService(LeetCodeService):
+    """LeetCodeService that records each request's latency, retries included"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies: List[float] = []
+
+    async def _send(self, query, variables):
+        started = time.perf_counter()
+        try:
+            return await super()._send(query, variables)
+        finally:
+            self.latencies.append(time.perf_counter() - started)
+
+
+class ServerThread:
+    """Runs the fake HTTP backends on their own loop, off the measured one"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    async def run(self, coroutine):
+        """Run a coroutine on the server loop and wait for it"""
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        return await asyncio.wrap_future(future)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class BenchmarkRunner:
+    """Seeds the fakes and drives each pipeline through the real services"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.servers = ServerThread()
+        self.leetcode = FakeLeetCodeServer(
+            args.leetcode_latency, args.throttle_rate, args.retry_after
+        )
+        self.supabase = FakeSupabaseServer(args.db_latency)
+        self.discord = FakeDiscord(args.discord_latency)
+
+    async def start(self):
+        self.servers.start()
+        await self.servers.run(self.leetcode.start())
+        await self.servers.run(self.supabase.start())
+
+    async def stop(self):
+        await self.servers.run(self.leetcode.stop())
+        await self.servers.run(self.supabase.stop())
+        self.servers.stop()
+
+    def _reset(self):
+        self.leetcode.reset()
+        self.supabase.reset()
+        self.discord.reset()
+
+    def _database(self) -> DatabaseManager:
+        return DatabaseManager(
+            self.supabase.url,
+            "benchmark",
+            self.args.db_workers,
+            used_questions_path=None,
+        )
+
+    def _requests(self) -> Dict[str, int]:
+        requests = {f"leetcode {k}": v for k, v in self.leetcode.requests.items()}
+        requests.update({f"db {k}": v for k, v in self.supabase.requests.items()})
+        requests.update({f"discord {k}": v for k, v in self.discord.requests.items()})
+        if self.leetcode.throttled:
+            requests["leetcode throttled"] = self.leetcode.throttled
+        return requests
+
+    async def run_scoring(self, users: int) -> BenchmarkResult:
+        """Score one pending daily question for every user"""
+        sent_at = datetime.utcnow() - timedelta(hours=25)
+        self.supabase.insert("users", _users(users))
+        self.supabase.insert(
+            "daily_questions",
+            [
+                {
+                    "question_slug": self.leetcode.solved_slug,
+                    "question_title": "Two Sum",
+                    "difficulty": "Easy",
+                    "sent_at": sent_at.isoformat(),
+                    "timestamp": int(sent_at.timestamp()),
+                }
+            ],
+        )
+        self.leetcode.solved_timestamp = int(sent_at.timestamp()) + 60
+
+        db = self._database()
+        http_client = HttpClient(self.args.http_pool_size, self.args.http_pool_size)
+        leetcode_service = TimedLeetCodeService(
+            http_client,
+            self.args.leetcode_rps,
+            self.args.leetcode_burst,
+            backoff_base=self.args.retry_after,
+            submission_batch_size=self.args.batch_size,
+        )
+        leetcode_service.base_url = self.leetcode.url
+        leaderboard = LeaderboardCache(db)
+        await leaderboard.build()
+        bot = SimpleNamespace(
+            db=db,
+            config=SimpleNamespace(catch_up_days=7),
+            scoring_service=ScoringService(
+                db,
+                leetcode_service,
+                concurrency=self.args.concurrency,
+                leaderboard=leaderboard,
+            ),
+        )
+        scheduled_tasks = ScheduledTasks(bot)
+
+        await leetcode_service.init_session()
+        self._reset_counters()
+        started = time.perf_counter()
+        try:
+            await scheduled_tasks.score_pending_questions()
+        finally:
+            seconds = time.perf_counter() - started
+            await leetcode_service.close_session()
+            db.close()
+
+        stats = scheduled_tasks.last_scoring_stats or {}
+        if stats.get("checked", 0) != users:
+            logger.warning(f"Only {stats.get('checked', 0)}/{users} users were checked")
+        latencies = leetcode_service.latencies
+        return BenchmarkResult(
+            "scoring",
+            users,
+            seconds,
+            stats.get("checked", 0),
+            percentile(latencies, 0.5),
+            percentile(latencies, 0.99),
+            self._requests(),
+        )
+
+    async def run_groups(self, users: int) -> BenchmarkResult:
+        """Assign every user to a group as if they all joined at once"""
+        db = self._database()
+        group_service = GroupService(db, self.args.group_size)
+        guild = FakeGuild(self.discord)
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+        latencies = []
+
+        async def join(member_id: int):
+            async with semaphore:
+                started = time.perf_counter()
+                group = await group_service.assign_user_to_group(
+                    FakeMember(member_id), guild
+                )
+                latencies.append(time.perf_counter() - started)
+                return group
+
+        self._reset_counters()
+        started = time.perf_counter()
+        try:
+            groups = await asyncio.gather(*(join(i) for i in range(users)))
+        finally:
+            seconds = time.perf_counter() - started
+            db.close()
+
+        assigned = sum(1 for group in groups if group)
+        if assigned != users:
+            logger.warning(f"Only {assigned}/{users} users were assigned a group")
+        return BenchmarkResult(
+            "groups",
+            users,
+            seconds,
+            assigned,
+            percentile(latencies, 0.5),
+            percentile(latencies, 0.99),
+            self._requests(),
+        )
+
+    async def run_fanout(self, users: int) -> BenchmarkResult:
+        """Send the daily question to the channel of every full group"""
+        guild = FakeGuild(self.discord)
+        group_count = max(1, users // self.args.group_size)
+        channel_ids = [self.discord.next_id() for _ in range(group_count)]
+        for channel_id in channel_ids:
+            guild.add_channel(channel_id)
+        self.supabase.insert(
+            "groups",
+            [
+                {
+                    "name": f"Group-{i + 1}",
+                    "guild_id": str(guild.id),
+                    "channel_id": str(channel_id),
+                }
+                for i, channel_id in enumerate(channel_ids)
+            ],
+        )
+
+        db = self._database()
+        bot = SimpleNamespace(
+            db=db,
+            fanout=FanoutDispatcher(self.args.fanout_concurrency),
+            config=SimpleNamespace(daily_points=5),
+            get_guild=lambda guild_id: guild,
+        )
+        # Resolve channels the way the gateway bot does
+        bot.group_channels = lambda groups: LeetCodeBot.group_channels(bot, groups)
+        question = {"title": "Two Sum", "titleSlug": "two-sum", "difficulty": "Easy"}
+
+        self._reset_counters()
+        started = time.perf_counter()
+        try:
+            await ScheduledTasks(bot)._send_question_to_groups(question)
+        finally:
+            seconds = time.perf_counter() - started
+            db.close()
+
+        latencies = [sent - started for sent in self.discord.sent_at]
+        return BenchmarkResult(
+            "fanout",
+            users,
+            seconds,
+            len(latencies),
+            percentile(latencies, 0.5),
+            percentile(latencies, 0.99),
+            self._requests(),
+        )
+
+    def _reset_counters(self):
+        """Count only the requests made by the measured pipeline"""
+        self.leetcode.reset()
+        self.supabase.requests.clear()
+        self.discord.reset()
+
+    async def run(self) -> List[BenchmarkResult]:
+        results = []
+        for pipeline in self.args.pipelines:
+            for users in self.args.users:
+                self._reset()
+                result = await getattr(self, f"run_{pipeline}")(users)
+                print_result(result)
+                results.append(result)
+        return results
+
+
+def _users(count: int) -> List[Dict]:
+    return [
+        {
+            "discord_id": str(i),
+            "leetcode_username": f"user{i}",
+            "monthly_score": 0,
+            "weekly_score": 0,
+        }
+        for i in range(count)
+    ]
+
+
+def print_result(result: BenchmarkResult):
+    print(
+        f"{result.pipeline:<8} {result.users:>7} users  "
+        f"{result.seconds:8.2f}s  {result.throughput:9.1f}/s  "
+        f"p50 {result.p50 * 1000:7.1f}ms  p99 {result.p99 * 1000:7.1f}ms"
+    )
+    for name, count in sorted(result.requests.items()):
+        print(f"{'':<10}{name:<40}{count:>8}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--users", type=int, nargs="+", default=[100, 1000, 10000, 100000]
+    )
+    parser.add_argument("--pipelines", nargs="+", choices=PIPELINES, default=PIPELINES)
+    parser.add_argument("--leetcode-latency", type=float, default=0.05)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--db-latency", type=float, default=0.01)
+    parser.add_argument("--discord-latency", type=float, default=0.05)
+    # The production limit is 5 rps, raise it to measure the code itself
+    parser.add_argument("--leetcode-rps", type=float, default=1000.0)
+    parser.add_argument("--leetcode-burst", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--fanout-concurrency", type=int, default=25)
+    parser.add_argument("--group-size", type=int, default=5)
+    parser.add_argument("--db-workers", type=int, default=8)
+    parser.add_argument("--http-pool-size", type=int, default=100)
+    parser.add_argument("--json", help="Also write the results to this file")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    runner = BenchmarkRunner(args)
+    await runner.start()
+    try:
+        results = await runner.run()
+    finally:
+        await runner.stop()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                [{**asdict(r), "throughput": r.throughput} for r in results],
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+from src.config.settings import BotConfig
+from src.database.database_manager import DatabaseManager
+from src.services.graphql_recorder import GraphQLRecorder, ReplayHttpClient
+from src.services.http_client import HttpClient
+from src.services.leetcode_services import LeetCodeService
+from src.services.metrics import REGISTRY, HTTP_POOL, DB_CACHE
+
+
+def create_database(config: BotConfig) -> DatabaseManager:
+    """Database client shared by the bot and the scheduler worker"""
+    return DatabaseManager(
+        config.supabase_url,
+        config.supabase_key,
+        config.db_max_workers,
+        config.used_questions_path,
+        config.db_cache_size,
+        config.db_cache_ttl,
+    )
+
+
+def create_http_client(config: BotConfig):
+    """HTTP pool for LeetCode, or a replay of recorded traffic"""
+    if config.leetcode_replay_path:
+        return ReplayHttpClient(
+            config.leetcode_replay_path, config.leetcode_replay_speed
+        )
+    return HttpClient(
+        config.http_pool_size,
+        config.http_per_host_limit,
+        config.http_connect_timeout,
+        config.http_read_timeout,
+        config.http_dns_cache_ttl,
+        config.http_keepalive_timeout,
+    )
+
+
+def create_leetcode_service(config: BotConfig, http_client) -> LeetCodeService:
+    """Rate-limited LeetCode client, recording traffic if configured"""
+    return LeetCodeService(
+        http_client,
+        config.leetcode_requests_per_second,
+        config.leetcode_burst,
+        config.leetcode_max_retries,
+        username_cache_size=config.username_cache_size,
+        submission_batch_size=config.leetcode_batch_size,
+        recorder=(
+            GraphQLRecorder(config.leetcode_record_path)
+            if config.leetcode_record_path
+            else None
+        ),
+    )
+
+
+def register_pool_metrics(http_client, db: DatabaseManager):
+    """Copy pool and cache counters into gauges before each scrape"""
+
+    def collect():
+        for stat, value in http_client.stats().items():
+            HTTP_POOL.set(value, stat=stat)
+        for cache, stats in db.cache_stats().items():
+            for stat, value in stats.items():
+                DB_CACHE.set(value, cache=cache, stat=stat)
+
+    REGISTRY.add_collector(collect)
@@ -1,14 +1,27 @@
 import discord
+from discord.webhook.async_ import async_context
 from discord.ext import commands
 import logging
-from typing import Optional
+import time
+from collections import defaultdict
+from typing import Optional, Dict, List, Any
 
 
+from src.bot.components import (
+    create_database,
+    create_http_client,
+    create_leetcode_service,
+    register_pool_metrics,
+)
 from src.config.settings import BotConfig
-from src.database.database_manager import DatabaseManager
-from src.services.leetcode_services import LeetCodeService
 from src.services.group_services import GroupService
-from src.services.keep_alive import keep_alive
+from src.services.scoring_service import ScoringService
+from src.services.question_catalog import QuestionCatalog
+from src.services.fanout_service import FanoutDispatcher
+from src.services.leaderboard_cache import LeaderboardCache
+from src.services.health_server import HealthServer
+from src.services.profiler import CommandProfiler, instrument
+from src.services.metrics import COMMAND_SECONDS
 from src.tasks.scheduled_tasks import ScheduledTasks
 from src.commands.user_commands import UserCommands
 from src.events.event_handlers import EventHandlers
@@ -17,34 +30,123 @@ from src.events.event_handlers import EventHandlers
 logger = logging.getLogger(__name__)
 
 
-class LeetCodeBot(commands.Bot):
+class LeetCodeBot(commands.AutoShardedBot):
     """Main bot class that orchestrates all components"""
 
     def __init__(self, config: BotConfig):
         # Initialize Discord bot
-        super().__init__(command_prefix=config.command_prefix, intents=config.intents)
+        super().__init__(
+            command_prefix=config.command_prefix,
+            intents=config.intents,
+            shard_count=config.shard_count,
+            shard_ids=config.shard_ids,
+        )
         self.config = config
-        self.db = DatabaseManager(config.supabase_url, config.supabase_key)
-        self.leetcode_service = LeetCodeService()
+        self.db = create_database(config)
+        self.http_client = create_http_client(config)
+        self.leetcode_service = create_leetcode_service(config, self.http_client)
+        self.question_catalog = QuestionCatalog(
+            self.leetcode_service, config.question_catalog_path
+        )
         self.group_service = GroupService(self.db, config.max_group_size)
+        self.leaderboard = LeaderboardCache(self.db)
+        self.scoring_service = ScoringService(
+            self.db,
+            self.leetcode_service,
+            config.daily_points,
+            config.scoring_concurrency,
+            self.leaderboard,
+        )
+        self.fanout = FanoutDispatcher(config.fanout_concurrency)
         self.scheduled_tasks = ScheduledTasks(self)
+        self.health_server = HealthServer(self, port=config.health_port)
+        self.profiler = CommandProfiler(
+            config.slow_command_threshold,
+            config.profile_sample_rate,
+            config.profile_dir,
+        )
+        # Gateway REST calls and interaction responses both count as Discord time.
+        # Interaction responses go through discord.py's process-wide webhook
+        # adapter (discord.webhook.async_.async_context, an internal of 2.x), so
+        # that shared object is patched, once however many bots are created
+        instrument(self.http, "request", "discord")
+        instrument(async_context.get(), "request", "discord")
+        register_pool_metrics(self.http_client, self.db)
 
     async def setup_hook(self):
         """Setup all command cogs and event handlers"""
         try:
+            # Open the HTTP pool before any command or event can use it
+            await self.leetcode_service.init_session()
+            await self.health_server.start()
+
             await self.add_cog(UserCommands(self))
             await self.add_cog(EventHandlers(self))
             logger.info("All cogs loaded successfully")
+
+            # Load used questions once so daily picks never re-read history.
+            # Only the process that picks questions keeps the local snapshot
+            if self.runs_scheduled_jobs and self.runs_global_jobs:
+                used_slugs = await self.db.get_used_question_slugs()
+                self.question_catalog.exclude(used_slugs)
+
+            await self.leaderboard.build()
         except Exception as e:
             logger.error(f"Error setting up cogs: {e}")
             raise
 
+    @property
+    def runs_scheduled_jobs(self) -> bool:
+        """False when a separate scheduler worker runs them"""
+        return self.config.run_scheduled_jobs
+
+    @property
+    def runs_global_jobs(self) -> bool:
+        """Whether this process picks and scores questions for every guild
+
+        With shards split across processes only the one running shard 0 does,
+        the others just fan the day's question out to their own guilds.
+        """
+        return not self.config.shard_ids or 0 in self.config.shard_ids
+
+    def group_channels(self, groups: List[Dict[str, Any]]) -> Dict[int, List[Any]]:
+        """Cached channels of the groups, keyed by the shard of their guild"""
+        channels_by_shard = defaultdict(list)
+        for group in groups:
+            if not group.get("channel_id") or not group.get("guild_id"):
+                continue
+            # Guilds on other processes' shards aren't cached here and drop out
+            guild = self.get_guild(int(group["guild_id"]))
+            if not guild:
+                continue
+            channel = guild.get_channel(int(group["channel_id"]))
+            if channel:
+                channels_by_shard[guild.shard_id].append(channel)
+        return channels_by_shard
+
+    async def invoke(self, ctx: commands.Context):
+        """Invoke a command and record its duration"""
+        started = time.perf_counter()
+        name = ctx.command.qualified_name if ctx.command else "unknown"
+        try:
+            async with self.profiler.profile(f"command {name}"):
+                await super().invoke(ctx)
+        finally:
+            if ctx.command:
+                COMMAND_SECONDS.observe(
+                    time.perf_counter() - started,
+                    command=ctx.command.qualified_name,
+                    outcome="error" if ctx.command_failed else "ok",
+                )
+
     async def close(self):
         """Cleanup when bot is shutting down"""
         try:
             # Stop scheduled tasks
             self.scheduled_tasks.stop_all_tasks()
             await self.leetcode_service.close_session()
+            await self.health_server.stop()
+            self.db.close()
             await super().close()
             logger.info("Bot shutdown complete")
 
@@ -54,7 +156,6 @@ class LeetCodeBot(commands.Bot):
     def run(self):
         """Run the bot"""
         try:
-            keep_alive()  # Start keep-alive server
             logger.info("Starting bot...")
             super().run(self.config.discord_token)
         except Exception as e:
@@ -0,0 +1,118 @@
+import asyncio
+import discord
+import logging
+from collections import defaultdict
+from typing import Dict, List, Any
+
+from src.bot.components import (
+    create_database,
+    create_http_client,
+    create_leetcode_service,
+    register_pool_metrics,
+)
+from src.config.settings import BotConfig
+from src.services.scoring_service import ScoringService
+from src.services.question_catalog import QuestionCatalog
+from src.services.fanout_service import FanoutDispatcher
+from src.services.health_server import WorkerHealthServer
+from src.tasks.scheduled_tasks import ScheduledTasks
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerWorker(discord.Client):
+    """Runs the scheduled jobs in their own process
+
+    Logs in over Discord's REST API without opening a gateway connection, so
+    question picks, fan-out and scoring never compete with interactions and
+    the worker restarts independently of the bot.
+    """
+
+    # The bot's leaderboard cache lives in the gateway process, which rebuilds
+    # it when it sees new submissions (ScheduledTasks.watch_scores_task)
+    leaderboard = None
+    runs_scheduled_jobs = True
+    runs_global_jobs = True
+
+    def __init__(self, config: BotConfig):
+        # Intents only apply to a gateway session, which the worker never opens
+        super().__init__(intents=discord.Intents.default())
+        self.config = config
+        self.db = create_database(config)
+        self.http_client = create_http_client(config)
+        self.leetcode_service = create_leetcode_service(config, self.http_client)
+        self.question_catalog = QuestionCatalog(
+            self.leetcode_service, config.question_catalog_path
+        )
+        self.scoring_service = ScoringService(
+            self.db,
+            self.leetcode_service,
+            config.daily_points,
+            config.scoring_concurrency,
+        )
+        self.fanout = FanoutDispatcher(config.fanout_concurrency)
+        self.scheduled_tasks = ScheduledTasks(self)
+        self.health_server = WorkerHealthServer(self, port=config.worker_health_port)
+        register_pool_metrics(self.http_client, self.db)
+        self._stopped = asyncio.Event()
+
+    async def setup_hook(self):
+        """Open the HTTP pool and load used questions once logged in"""
+        try:
+            await self.leetcode_service.init_session()
+            await self.health_server.start()
+            used_slugs = await self.db.get_used_question_slugs()
+            self.question_catalog.exclude(used_slugs)
+        except Exception as e:
+            logger.error(f"Error setting up scheduler worker: {e}")
+            raise
+
+    async def start(self, token: str, *, reconnect: bool = True):
+        """Log in and run the jobs until closed, without a gateway session"""
+        await self.login(token)
+        self.scheduled_tasks.start_all_tasks()
+        logger.info("Scheduler worker started")
+        await self._stopped.wait()
+
+    async def wait_until_ready(self):
+        """Jobs only need the REST session, which exists once logged in"""
+
+    def group_channels(self, groups: List[Dict[str, Any]]) -> Dict[int, List[Any]]:
+        """REST handles for the group channels, keyed by the shard of their guild"""
+        shard_count = self.config.shard_count or 1
+        channels_by_shard = defaultdict(list)
+        for group in groups:
+            if not group.get("channel_id") or not group.get("guild_id"):
+                continue
+            guild_id = int(group["guild_id"])
+            # Same formula Discord uses to place a guild on a shard
+            shard_id = (guild_id >> 22) % shard_count
+            channels_by_shard[shard_id].append(
+                self.get_partial_messageable(
+                    int(group["channel_id"]), guild_id=guild_id
+                )
+            )
+        return channels_by_shard
+
+    async def close(self):
+        """Stop the jobs and release connections"""
+        try:
+            self.scheduled_tasks.stop_all_tasks()
+            await self.leetcode_service.close_session()
+            await self.health_server.stop()
+            self.db.close()
+            self._stopped.set()
+            await super().close()
+            logger.info("Scheduler worker shutdown complete")
+
+        except Exception as e:
+            logger.error(f"Error during scheduler worker shutdown: {e}")
+
+    def run(self):
+        """Run the worker"""
+        try:
+            logger.info("Starting scheduler worker...")
+            super().run(self.config.discord_token)
+        except Exception as e:
+            logger.error(f"Error running scheduler worker: {e}")
+            raise
@@ -30,8 +30,9 @@ class UserCommands(commands.Cog):
                 return
 
             # Update username
-            success = self.bot.db.update_user_username(user_id, new_username)
+            success = await self.bot.db.update_user_username(user_id, new_username)
             if success:
+                self.bot.leaderboard.update_username(user_id, new_username)
                 await ctx.send(
                     f"✅ Successfully updated your Leetcode username to: `{new_username}`"
                 )
@@ -49,7 +50,7 @@ class UserCommands(commands.Cog):
         """Show user profile"""
         try:
             user_id = str(ctx.author.id)
-            user_data = self.bot.db.get_user(user_id)
+            user_data = await self.bot.db.get_user(user_id)
 
             if not user_data:
                 await ctx.send(
@@ -89,27 +90,47 @@ class UserCommands(commands.Cog):
     async def show_leaderboard(self, ctx: commands.Context, type_arg: str = "monthly"):
         """Show leaderboard (monthly/weekly)"""
         try:
+            leaderboard = self.bot.leaderboard
             if type_arg.lower() == "weekly":
-                # Show group weekly leaderboard
+                # Show group weekly leaderboard, groups are per server
+                if not ctx.guild:
+                    await ctx.send(
+                        "Use this command in a server to see your group's leaderboard."
+                    )
+                    return
+
                 user_id = str(ctx.author.id)
-                user_group = self.bot.db.get_user_group(user_id)
+                guild_id = str(ctx.guild.id)
+                users = None
+                if leaderboard.ready:
+                    group_id = leaderboard.get_user_group_id(user_id, guild_id)
+                    if group_id is not None:
+                        users = leaderboard.get_group_weekly_leaderboard(group_id)
+                else:
+                    # Group and ranked members come back in one request
+                    user_group = await self.bot.db.get_user_group_weekly_leaderboard(
+                        user_id, guild_id
+                    )
+                    if user_group:
+                        _, users = user_group
 
-                if not user_group:
+                if users is None:
                     await ctx.send(
                         "You're not in any group yet. Please complete registration first."
                     )
                     return
 
-                users = self.bot.db.get_group_weekly_leaderboard(user_group["id"])
                 embed = discord.Embed(
                     title="🏆 Weekly Group Leaderboard", color=0xFFD700
                 )
                 score_field = "weekly_score"
             else:
                 # Show monthly global leaderboard
-                users = self.bot.db.get_monthly_leaderboard(
-                    self.bot.config.leaderboard_limit
-                )
+                limit = self.bot.config.leaderboard_limit
+                if leaderboard.ready:
+                    users = leaderboard.get_monthly_leaderboard(limit)
+                else:
+                    users = await self.bot.db.get_monthly_leaderboard(limit)
                 embed = discord.Embed(
                     title="🌟 Monthly Global Leaderboard", color=0xFF6B6B
                 )
@@ -146,3 +167,42 @@ class UserCommands(commands.Cog):
         except Exception as e:
             logger.error(f"Error showing leaderboard: {e}")
             await ctx.send("Failed to fetch leaderboard.")
+
+    @commands.command(name="rank")
+    async def show_rank(self, ctx: commands.Context, type_arg: str = "monthly"):
+        """Show your rank and percentile (monthly/weekly)"""
+        try:
+            leaderboard = self.bot.leaderboard
+            if not leaderboard.ready:
+                await ctx.send("Rankings are still loading. Please try again shortly.")
+                return
+
+            if type_arg.lower() == "weekly":
+                score_field = "weekly_score"
+                title = "📈 Weekly Rank"
+            else:
+                score_field = "monthly_score"
+                title = "📈 Monthly Rank"
+
+            user_rank = leaderboard.get_rank(str(ctx.author.id), score_field)
+            if not user_rank:
+                await ctx.send(
+                    "You're not registered yet. Please complete registration first when you joined the server."
+                )
+                return
+
+            rank, total, score = user_rank
+            embed = discord.Embed(
+                title=f"{title}: {ctx.author.display_name}", color=0x7289DA
+            )
+            embed.add_field(name="Rank", value=f"#{rank} of {total}", inline=True)
+            embed.add_field(
+                name="Percentile", value=f"Top {rank / total * 100:.1f}%", inline=True
+            )
+            embed.add_field(name="Score", value=f"{score} points", inline=True)
+
+            await ctx.send(embed=embed)
+
+        except Exception as e:
+            logger.error(f"Error showing rank: {e}")
+            await ctx.send("Failed to fetch rank.")
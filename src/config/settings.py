@@ -11,13 +11,64 @@ class BotConfig:
         self.discord_token = os.getenv("DISCORD_TOKEN")
         self.supabase_url = os.getenv("SUPABASE_URL")
         self.supabase_key = os.getenv("SUPABASE_KEY")
-        self.main_guild_id = int(os.getenv("MAIN_GUILD_ID"))
+        # Shards run by this process, every shard when unset
+        shard_ids = os.getenv("SHARD_IDS")
+        self.shard_ids = (
+            [int(shard_id) for shard_id in shard_ids.split(",")] if shard_ids else None
+        )
+        shard_count = os.getenv("SHARD_COUNT")
+        self.shard_count = int(shard_count) if shard_count else None
+        # Set to false when worker.py runs the scheduled jobs instead
+        self.run_scheduled_jobs = (
+            os.getenv("RUN_SCHEDULED_JOBS", "true").lower() != "false"
+        )
 
         # Bot settings
         self.command_prefix = "!"
         self.max_group_size = 5
         self.daily_points = 5
         self.leaderboard_limit = 10
+        self.catch_up_days = int(os.getenv("CATCH_UP_DAYS", "7"))
+        self.scoring_concurrency = int(os.getenv("SCORING_CONCURRENCY", "20"))
+        self.fanout_concurrency = int(os.getenv("FANOUT_CONCURRENCY", "25"))
+        self.question_catalog_path = os.getenv(
+            "QUESTION_CATALOG_PATH", "data/question_catalog.json"
+        )
+        self.slow_command_threshold = float(os.getenv("SLOW_COMMAND_THRESHOLD", "1.0"))
+        self.profile_sample_rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+        self.profile_dir = os.getenv("PROFILE_DIR", "data/profiles")
+        # Capture LeetCode traffic to a file, or answer from one instead
+        self.leetcode_record_path = os.getenv("LEETCODE_RECORD_PATH")
+        self.leetcode_replay_path = os.getenv("LEETCODE_REPLAY_PATH")
+        self.leetcode_replay_speed = float(os.getenv("LEETCODE_REPLAY_SPEED", "1.0"))
+
+        # Health server port, PORT is what most hosts provide
+        self.health_port = int(os.getenv("PORT", "8080"))
+        # The scheduler worker serves its own, so both can share a host
+        self.worker_health_port = int(os.getenv("WORKER_HEALTH_PORT", "8081"))
+
+        # LeetCode API settings
+        self.leetcode_requests_per_second = float(
+            os.getenv("LEETCODE_REQUESTS_PER_SECOND", "5")
+        )
+        self.leetcode_burst = int(os.getenv("LEETCODE_BURST", "10"))
+        self.leetcode_max_retries = int(os.getenv("LEETCODE_MAX_RETRIES", "4"))
+        self.leetcode_batch_size = int(os.getenv("LEETCODE_BATCH_SIZE", "20"))
+        self.http_pool_size = int(os.getenv("HTTP_POOL_SIZE", "100"))
+        self.http_per_host_limit = int(os.getenv("HTTP_PER_HOST_LIMIT", "50"))
+        self.http_connect_timeout = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+        self.http_read_timeout = float(os.getenv("HTTP_READ_TIMEOUT", "15"))
+        self.http_dns_cache_ttl = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+        self.http_keepalive_timeout = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "60"))
+        self.username_cache_size = int(os.getenv("USERNAME_CACHE_SIZE", "10000"))
+
+        # Database settings
+        self.db_max_workers = int(os.getenv("DB_MAX_WORKERS", "8"))
+        self.db_cache_size = int(os.getenv("DB_CACHE_SIZE", "10000"))
+        self.db_cache_ttl = float(os.getenv("DB_CACHE_TTL", "600"))
+        self.used_questions_path = os.getenv(
+            "USED_QUESTIONS_PATH", "data/used_questions.json"
+        )
 
         # Discord intents
         self.intents = discord.Intents.default()
@@ -34,8 +85,10 @@ class BotConfig:
             self.discord_token,
             self.supabase_url,
             self.supabase_key,
-            self.main_guild_id,
         ]
 
         if not all(required_vars):
             raise ValueError("Missing required environment variables")
+
+        if self.shard_ids and not self.shard_count:
+            raise ValueError("SHARD_COUNT is required when SHARD_IDS is set")
@@ -1,33 +1,131 @@
 from supabase import create_client, Client
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
 from datetime import datetime
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Set, Tuple
+import asyncio
+import functools
 import logging
+from src.database.used_questions import UsedQuestionStore
+from src.services.metrics import DB_OPERATION_SECONDS, DB_QUERY_ERRORS
+from src.services.profiler import phase
+from src.services.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# Name of the DatabaseManager method running, for labelling query errors
+_current_method: ContextVar[str] = ContextVar("db_method", default="unknown")
+
+
+def _timed(method):
+    """Record how long a DatabaseManager method takes"""
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        token = _current_method.set(method.__name__)
+        try:
+            with phase("db"), DB_OPERATION_SECONDS.time(method=method.__name__):
+                return await method(self, *args, **kwargs)
+        finally:
+            _current_method.reset(token)
+
+    return wrapper
+
 
 class DatabaseManager:
     """Handles all database operations"""
 
-    def __init__(self, supabase_url: str, supabase_key: str):
+    def __init__(
+        self,
+        supabase_url: str,
+        supabase_key: str,
+        max_workers: int = 8,
+        used_questions_path: Optional[str] = None,
+        cache_size: int = 10000,
+        cache_ttl: float = 600,
+    ):
         self.client: Client = create_client(supabase_url, supabase_key)
+        # The supabase client is blocking, so queries run on a bounded pool
+        # instead of on the Discord event loop
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="supabase"
+        )
+        self._used_questions = UsedQuestionStore(used_questions_path)
+        self._used_questions_loaded = False
+        # Write-through caches, the TTL bounds staleness from outside edits
+        self.cache_ttl = cache_ttl
+        self._user_cache = TTLCache(cache_size)
+        self._membership_cache = TTLCache(cache_size)
+        self._group_cache = TTLCache(cache_size)
+
+    async def _execute(self, query):
+        """Run a PostgREST query off the event loop"""
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor, query.execute)
+        except Exception:
+            DB_QUERY_ERRORS.inc(method=_current_method.get())
+            raise
+
+    async def _execute_all(self, build_query, page_size: int = 1000) -> List[Any]:
+        """Run a select page by page, since PostgREST caps rows per response"""
+        rows = []
+        while True:
+            result = await self._execute(
+                build_query().range(len(rows), len(rows) + page_size - 1)
+            )
+            rows.extend(result.data)
+            if len(result.data) < page_size:
+                return rows
+
+    def close(self):
+        """Release the query executor"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit/miss counters for the user, membership and group caches"""
+        caches = {
+            "users": self._user_cache,
+            "memberships": self._membership_cache,
+            "groups": self._group_cache,
+        }
+        return {
+            name: {"hits": cache.hits, "misses": cache.misses, "size": len(cache)}
+            for name, cache in caches.items()
+        }
+
+    def invalidate_users(self):
+        """Drop every cached user row, e.g. after another process scored them"""
+        self._user_cache.clear()
+
+    def _cache_user_result(self, discord_id: str, result):
+        """Write an updated user row through to the cache"""
+        if result.data:
+            self._user_cache.set(discord_id, result.data[0], self.cache_ttl)
+        else:
+            self._user_cache.invalidate(discord_id)
 
     # User operations
-    def get_user(self, discord_id: str) -> Optional[Dict[str, Any]]:
+    @_timed
+    async def get_user(self, discord_id: str) -> Optional[Dict[str, Any]]:
         """Get user by Discord ID"""
+        found, user = self._user_cache.get(discord_id)
+        if found:
+            return user
+
         try:
-            result = (
-                self.client.table("users")
-                .select("*")
-                .eq("discord_id", discord_id)
-                .execute()
+            result = await self._execute(
+                self.client.table("users").select("*").eq("discord_id", discord_id)
             )
-            return result.data[0] if result.data else None
+            user = result.data[0] if result.data else None
+            self._user_cache.set(discord_id, user, self.cache_ttl)
+            return user
         except Exception as e:
             logger.error(f"Error getting user {discord_id}: {e}")
             return None
 
-    def create_user(
+    @_timed
+    async def create_user(
         self, discord_id: str, leetcode_username: str
     ) -> Optional[Dict[str, Any]]:
         """Create a new user"""
@@ -39,32 +137,46 @@ class DatabaseManager:
                 "monthly_score": 0,
                 "weekly_score": 0,
             }
-            result = self.client.table("users").insert(user_data).execute()
+            result = await self._execute(self.client.table("users").insert(user_data))
+            self._cache_user_result(discord_id, result)
             return result.data[0] if result.data else None
         except Exception as e:
             logger.error(f"Error creating user: {e}")
             return None
 
-    def update_user_username(self, discord_id: str, new_username: str) -> bool:
+    @_timed
+    async def get_all_users(self) -> List[Dict[str, Any]]:
+        """Get all registered users"""
+        try:
+            return await self._execute_all(
+                lambda: self.client.table("users").select("*").order("discord_id")
+            )
+        except Exception as e:
+            logger.error(f"Error getting users: {e}")
+            return []
+
+    @_timed
+    async def update_user_username(self, discord_id: str, new_username: str) -> bool:
         """Update user's Leetcode username"""
         try:
-            result = (
+            result = await self._execute(
                 self.client.table("users")
                 .update({"leetcode_username": new_username})
                 .eq("discord_id", discord_id)
-                .execute()
             )
+            self._cache_user_result(discord_id, result)
             return bool(result.data)
         except Exception as e:
             logger.error(f"Error updating username: {e}")
             return False
 
-    def update_user_scores(
+    @_timed
+    async def update_user_scores(
         self, discord_id: str, monthly_score: int, weekly_score: int
     ) -> bool:
         """Update user's scores"""
         try:
-            result = (
+            result = await self._execute(
                 self.client.table("users")
                 .update(
                     {
@@ -73,106 +185,192 @@ class DatabaseManager:
                     }
                 )
                 .eq("discord_id", discord_id)
-                .execute()
             )
+            self._cache_user_result(discord_id, result)
             return bool(result.data)
         except Exception as e:
             logger.error(f"Error updating scores: {e}")
             return False
 
     # Group operations
-    def get_all_groups(self) -> List[Dict[str, Any]]:
-        """Get all groups"""
+    @_timed
+    async def get_all_groups(self) -> List[Dict[str, Any]]:
+        """Get all groups across every guild"""
         try:
-            result = self.client.table("groups").select("*").execute()
-            return result.data
+            return await self._execute_all(
+                lambda: self.client.table("groups").select("*").order("id")
+            )
         except Exception as e:
             logger.error(f"Error getting groups: {e}")
             return []
 
-    def create_group(
-        self, name: str, channel_id: str = None
+    @_timed
+    async def get_group_count(self, guild_id: str) -> int:
+        """Get the number of groups in a guild"""
+        try:
+            result = await self._execute(
+                self.client.table("groups")
+                .select("id", count="exact")
+                .eq("guild_id", guild_id)
+                .limit(1)
+            )
+            return result.count or 0
+        except Exception as e:
+            logger.error(f"Error counting groups: {e}")
+            return 0
+
+    @_timed
+    async def claim_group_slot(
+        self, discord_id: str, max_group_size: int, guild_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """Atomically add a user to the first group with room in a guild
+
+        Returns None when every group is full.
+        """
+        try:
+            result = await self._execute(
+                self.client.rpc(
+                    "claim_group_slot",
+                    {
+                        "p_discord_id": discord_id,
+                        "p_max_size": max_group_size,
+                        "p_guild_id": guild_id,
+                    },
+                )
+            )
+            if not result.data:
+                return None
+
+            group = result.data[0]
+            self._membership_cache.set(
+                (guild_id, discord_id), group["id"], self.cache_ttl
+            )
+            self._group_cache.set(group["id"], group, self.cache_ttl)
+            return group
+        except Exception as e:
+            logger.error(f"Error claiming group slot: {e}")
+            return None
+
+    @_timed
+    async def create_group(
+        self, name: str, guild_id: str, channel_id: str = None
     ) -> Optional[Dict[str, Any]]:
-        """Create a new group"""
+        """Create a new group in a guild"""
         try:
             group_data = {
                 "name": name,
+                "guild_id": guild_id,
                 "created_at": datetime.utcnow().isoformat(),
             }
             if channel_id:
                 group_data["channel_id"] = channel_id
 
-            result = self.client.table("groups").insert(group_data).execute()
+            result = await self._execute(self.client.table("groups").insert(group_data))
             return result.data[0] if result.data else None
         except Exception as e:
             logger.error(f"Error creating group: {e}")
             return None
 
-    def update_group_channel(self, group_id: int, channel_id: str) -> bool:
+    @_timed
+    async def update_group_channel(self, group_id: int, channel_id: str) -> bool:
         """Update group's channel ID"""
         try:
-            result = (
+            result = await self._execute(
                 self.client.table("groups")
                 .update({"channel_id": channel_id})
                 .eq("id", group_id)
-                .execute()
             )
+            self._group_cache.invalidate(group_id)
             return bool(result.data)
         except Exception as e:
             logger.error(f"Error updating group channel: {e}")
             return False
 
-    def get_group_members(self, group_id: int) -> List[Dict[str, Any]]:
+    @_timed
+    async def get_group_members(self, group_id: int) -> List[Dict[str, Any]]:
         """Get members of a specific group"""
         try:
-            result = (
-                self.client.table("group_members")
-                .select("*")
-                .eq("group_id", group_id)
-                .execute()
+            result = await self._execute(
+                self.client.table("group_members").select("*").eq("group_id", group_id)
             )
             return result.data
         except Exception as e:
             logger.error(f"Error getting group members: {e}")
             return []
 
-    def add_member_to_group(self, group_id: int, discord_id: str) -> bool:
-        """Add member to group"""
+    @_timed
+    async def get_all_group_members(self) -> List[Dict[str, Any]]:
+        """Get every group membership with the guild of its group"""
+        try:
+            return await self._execute_all(
+                lambda: self.client.table("group_members")
+                .select("discord_id, group_id, groups(guild_id)")
+                .order("discord_id")
+            )
+        except Exception as e:
+            logger.error(f"Error getting all group members: {e}")
+            return []
+
+    @_timed
+    async def add_member_to_group(
+        self, group_id: int, discord_id: str, guild_id: str
+    ) -> bool:
+        """Add member to a group in a guild"""
         try:
             member_data = {
                 "group_id": group_id,
                 "discord_id": discord_id,
                 "joined_at": datetime.utcnow().isoformat(),
             }
-            result = self.client.table("group_members").insert(member_data).execute()
+            result = await self._execute(
+                self.client.table("group_members").insert(member_data)
+            )
+            if result.data:
+                self._membership_cache.set(
+                    (guild_id, discord_id), group_id, self.cache_ttl
+                )
             return bool(result.data)
         except Exception as e:
             logger.error(f"Error adding member to group: {e}")
             return False
 
-    def get_user_group(self, discord_id: str) -> Optional[Dict[str, Any]]:
-        """Get the group that a user belongs to"""
+    @_timed
+    async def get_user_group(
+        self, discord_id: str, guild_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """Get the group that a user belongs to in a guild"""
+        membership = (guild_id, discord_id)
+        found, group_id = self._membership_cache.get(membership)
+        if found:
+            if group_id is None:
+                return None
+            found, group = self._group_cache.get(group_id)
+            if found:
+                return group
+
         try:
-            result = (
+            # Embed the group through the group_id foreign key, inner to filter
+            result = await self._execute(
                 self.client.table("group_members")
-                .select("group_id")
+                .select("groups!inner(*)")
                 .eq("discord_id", discord_id)
-                .execute()
+                .eq("groups.guild_id", guild_id)
+                .limit(1)
             )
-            if not result.data:
-                return None
-
-            group_id = result.data[0]["group_id"]
-            group_result = (
-                self.client.table("groups").select("*").eq("id", group_id).execute()
-            )
-            return group_result.data[0] if group_result.data else None
+            group = result.data[0]["groups"] if result.data else None
+            if group:
+                self._membership_cache.set(membership, group["id"], self.cache_ttl)
+                self._group_cache.set(group["id"], group, self.cache_ttl)
+            else:
+                self._membership_cache.set(membership, None, self.cache_ttl)
+            return group
         except Exception as e:
             logger.error(f"Error getting user group: {e}")
             return None
 
     # Question operations
-    def save_daily_question(
+    @_timed
+    async def save_daily_question(
         self, question_slug: str, question_title: str, difficulty: str
     ) -> Optional[Dict[str, Any]]:
         """Save daily question to database"""
@@ -184,27 +382,110 @@ class DatabaseManager:
                 "sent_at": datetime.utcnow().isoformat(),
                 "timestamp": int(datetime.utcnow().timestamp()),
             }
-            result = (
-                self.client.table("daily_questions").insert(question_data).execute()
+            result = await self._execute(
+                self.client.table("daily_questions").insert(question_data)
             )
-            return result.data[0] if result.data else None
+            if not result.data:
+                return None
+
+            question = result.data[0]
+            if self._used_questions_loaded:
+                self._used_questions.add(question["id"], question["question_slug"])
+                await asyncio.to_thread(self._used_questions.save)
+            return question
         except Exception as e:
             logger.error(f"Error saving daily question: {e}")
             return None
 
-    def get_used_question_slugs(self) -> List[str]:
-        """Get list of used question slugs"""
+    @_timed
+    async def get_used_question_slugs(self) -> Set[str]:
+        """Get the set of used question slugs
+
+        Loaded once from the local snapshot plus any newer daily_questions
+        rows, then kept up to date by save_daily_question.
+        """
+        if self._used_questions_loaded:
+            return self._used_questions.slugs
+
         try:
-            result = (
-                self.client.table("daily_questions").select("question_slug").execute()
+            store = self._used_questions
+            await asyncio.to_thread(store.load)
+            # Paged in id order so no row is skipped past PostgREST's row cap
+            rows = await self._execute_all(
+                lambda: self.client.table("daily_questions")
+                .select("id, question_slug")
+                .gt("id", store.last_id)
+                .order("id")
             )
-            return [q["question_slug"] for q in result.data]
+            for q in rows:
+                store.add(q["id"], q["question_slug"])
+            if rows:
+                await asyncio.to_thread(store.save)
+            self._used_questions_loaded = True
+            return store.slugs
         except Exception as e:
             logger.error(f"Error getting used questions: {e}")
+            return set(self._used_questions.slugs)
+
+    @_timed
+    async def get_unscored_daily_questions(
+        self, start: datetime, end: datetime
+    ) -> List[Dict[str, Any]]:
+        """Get daily questions sent within the window that some user has no result for
+
+        Partly scored questions are included, so users whose check failed are
+        picked up by the next run. record_results skips existing results.
+        """
+        try:
+            result = await self._execute(
+                self.client.rpc(
+                    "unscored_daily_questions",
+                    {"p_start": start.isoformat(), "p_end": end.isoformat()},
+                )
+            )
+            return result.data or []
+        except Exception as e:
+            logger.error(f"Error getting unscored daily questions: {e}")
             return []
 
+    @_timed
+    async def get_latest_daily_question(
+        self, since: datetime
+    ) -> Optional[Dict[str, Any]]:
+        """Get the most recent daily question sent at or after `since`"""
+        try:
+            result = await self._execute(
+                self.client.table("daily_questions")
+                .select("*")
+                .gte("sent_at", since.isoformat())
+                .order("sent_at", desc=True)
+                .limit(1)
+            )
+            return result.data[0] if result.data else None
+        except Exception as e:
+            logger.error(f"Error getting latest daily question: {e}")
+            return None
+
     # Submission operations
-    def save_submission(self, user_id: str, question_id: int, solved: bool) -> bool:
+    @_timed
+    async def get_latest_submission_id(self) -> Optional[int]:
+        """Get the id of the newest submission, to notice scoring done elsewhere"""
+        try:
+            result = await self._execute(
+                self.client.table("submissions")
+                .select("id")
+                .order("id", desc=True)
+                .limit(1)
+            )
+            return result.data[0]["id"] if result.data else None
+        except Exception as e:
+            logger.error(f"Error getting latest submission: {e}")
+            return None
+
+    @_timed
+    async def save_submission(
+        self, user_id: str, question_id: int, solved: bool
+    ) -> bool:
         """Save submission result"""
         try:
             submission_data = {
@@ -213,46 +494,108 @@ class DatabaseManager:
                 "solved": solved,
                 "checked_at": datetime.utcnow().isoformat(),
             }
-            result = self.client.table("submissions").insert(submission_data).execute()
+            result = await self._execute(
+                self.client.table("submissions").insert(submission_data)
+            )
             return bool(result.data)
         except Exception as e:
             logger.error(f"Error saving submission: {e}")
             return False
 
+    @_timed
+    async def record_results(
+        self, question_id: int, results: List[Tuple[str, bool]], points: int
+    ) -> Optional[List[str]]:
+        """Save (user_id, solved) results and award points in one transaction
+
+        Results already recorded for the question are skipped and score
+        nothing. Returns the users awarded points, or None if the write failed.
+        """
+        if not results:
+            return []
+        try:
+            result = await self._execute(
+                self.client.rpc(
+                    "record_results",
+                    {
+                        "p_question_id": question_id,
+                        "p_results": [
+                            {"user_id": user_id, "solved": solved}
+                            for user_id, solved in results
+                        ],
+                        "p_points": points,
+                    },
+                )
+            )
+            awarded = [row["discord_id"] for row in result.data or []]
+            for discord_id in awarded:
+                self._user_cache.invalidate(discord_id)
+            return awarded
+        except Exception as e:
+            logger.error(f"Error recording results for question {question_id}: {e}")
+            return None
+
     # Leaderboard operations
-    def get_monthly_leaderboard(self, limit: int = 10) -> List[Dict[str, Any]]:
+    @_timed
+    async def get_monthly_leaderboard(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get monthly global leaderboard"""
         try:
-            result = (
+            result = await self._execute(
                 self.client.table("users")
                 .select("*")
                 .order("monthly_score", desc=True)
                 .limit(limit)
-                .execute()
             )
             return result.data
         except Exception as e:
             logger.error(f"Error getting monthly leaderboard: {e}")
             return []
 
-    def get_group_weekly_leaderboard(self, group_id: int) -> List[Dict[str, Any]]:
+    @_timed
+    async def get_group_weekly_leaderboard(self, group_id: int) -> List[Dict[str, Any]]:
         """Get weekly leaderboard for a specific group"""
         try:
-            # Get group members
-            group_members = self.get_group_members(group_id)
-            member_ids = [m["discord_id"] for m in group_members]
-
-            if not member_ids:
-                return []
-
-            result = (
-                self.client.table("users")
-                .select("*")
-                .in_("discord_id", member_ids)
-                .order("weekly_score", desc=True)
-                .execute()
+            result = await self._execute(
+                self.client.rpc("group_weekly_leaderboard", {"p_group_id": group_id})
             )
-            return result.data
+            return result.data or []
         except Exception as e:
             logger.error(f"Error getting group weekly leaderboard: {e}")
             return []
+
+    @_timed
+    async def get_user_group_weekly_leaderboard(
+        self, discord_id: str, guild_id: str
+    ) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """Get a user's group in a guild and its weekly leaderboard in one request
+
+        Returns None if the user isn't in a group there. A cached membership
+        skips the group lookup and only fetches the ranked members.
+        """
+        membership = (guild_id, discord_id)
+        found, group_id = self._membership_cache.get(membership)
+        if found:
+            if group_id is None:
+                return None
+            found, group = self._group_cache.get(group_id)
+            if found:
+                return group, await self.get_group_weekly_leaderboard(group_id)
+
+        try:
+            result = await self._execute(
+                self.client.rpc(
+                    "user_group_weekly_leaderboard",
+                    {"p_discord_id": discord_id, "p_guild_id": guild_id},
+                )
+            )
+            if not result.data:
+                self._membership_cache.set(membership, None, self.cache_ttl)
+                return None
+
+            group = result.data["group"]
+            self._membership_cache.set(membership, group["id"], self.cache_ttl)
+            self._group_cache.set(group["id"], group, self.cache_ttl)
+            return group, result.data["members"]
+        except Exception as e:
+            logger.error(f"Error getting user group weekly leaderboard: {e}")
+            return None
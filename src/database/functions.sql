@@ -0,0 +1,146 @@
+-- Postgres functions called by DatabaseManager through Supabase RPC.
+-- Apply these in the Supabase SQL editor before running the bot.
+
+-- One result per user per question, so scoring a question twice is a no-op.
+-- Remove any duplicate submissions before creating the index.
+create unique index if not exists submissions_user_question_idx
+    on submissions (user_id, question_id);
+
+drop function if exists increment_scores(text[], integer);
+
+-- Save a question's results and award points in one transaction.
+-- Results already recorded are skipped, so only newly inserted solves score.
+-- Returns the users who were awarded points.
+create or replace function record_results(p_question_id bigint, p_results jsonb, p_points integer)
+returns table (discord_id text)
+language sql
+as $$
+    with inserted as (
+        insert into submissions (user_id, question_id, solved, checked_at)
+        select r.user_id, p_question_id, r.solved, now()
+        from jsonb_to_recordset(p_results) as r(user_id text, solved boolean)
+        on conflict (user_id, question_id) do nothing
+        returning user_id, solved
+    )
+    update users u
+    set monthly_score = u.monthly_score + p_points,
+        weekly_score = u.weekly_score + p_points
+    from inserted i
+    where i.solved and u.discord_id = i.user_id
+    returning u.discord_id;
+$$;
+
+-- Daily questions sent within a window that some user has no result for yet,
+-- e.g. because their LeetCode check failed, so catch-up scores them again.
+create or replace function unscored_daily_questions(p_start timestamptz, p_end timestamptz)
+returns setof daily_questions
+language sql
+stable
+as $$
+    select q.*
+    from daily_questions q
+    where q.sent_at >= p_start
+      and q.sent_at < p_end
+      and (select count(*) from submissions s where s.question_id = q.id)
+          < (select count(*) from users)
+    order by q.sent_at;
+$$;
+
+-- Keep a denormalized member count on each group
+alter table groups add column if not exists member_count integer not null default 0;
+
+update groups g
+set member_count = (select count(*) from group_members m where m.group_id = g.id);
+
+create or replace function sync_group_member_count()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op = 'INSERT' then
+        update groups set member_count = member_count + 1 where id = new.group_id;
+    elsif tg_op = 'DELETE' then
+        update groups set member_count = member_count - 1 where id = old.group_id;
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists group_members_count on group_members;
+create trigger group_members_count
+after insert or delete on group_members
+for each row execute function sync_group_member_count();
+
+-- Groups belong to the Discord guild whose channels they use.
+-- Groups made before multi-guild support need backfilling with the guild id, e.g.
+--   update groups set guild_id = '<guild id>' where guild_id is null;
+alter table groups add column if not exists guild_id text;
+
+create index if not exists groups_guild_id_idx on groups (guild_id, id);
+
+drop function if exists claim_group_slot(text, integer);
+drop function if exists user_group_weekly_leaderboard(text);
+
+-- Add a user to the first group with a free slot in a guild, returns no rows if all are full.
+-- Groups still waiting on their Discord channel are skipped.
+create or replace function claim_group_slot(p_discord_id text, p_max_size integer, p_guild_id text)
+returns setof groups
+language plpgsql
+as $$
+declare
+    claimed groups;
+begin
+    select * into claimed
+    from groups
+    where guild_id = p_guild_id and member_count < p_max_size and channel_id is not null
+    order by id
+    limit 1
+    for update skip locked;
+
+    if not found then
+        return;
+    end if;
+
+    insert into group_members (group_id, discord_id, joined_at)
+    values (claimed.id, p_discord_id, now());
+
+    return query select * from groups where id = claimed.id;
+end;
+$$;
+
+-- Members of a group ordered by weekly score
+create or replace function group_weekly_leaderboard(p_group_id bigint)
+returns setof users
+language sql
+stable
+as $$
+    select u.*
+    from group_members m
+    join users u on u.discord_id = m.discord_id
+    where m.group_id = p_group_id
+    order by u.weekly_score desc;
+$$;
+
+-- A user's group in a guild and its members ordered by weekly score, null if not in a group
+create or replace function user_group_weekly_leaderboard(p_discord_id text, p_guild_id text)
+returns json
+language sql
+stable
+as $$
+    select json_build_object(
+        'group', to_json(g),
+        'members', coalesce(
+            (
+                select json_agg(u order by u.weekly_score desc)
+                from group_members m
+                join users u on u.discord_id = m.discord_id
+                where m.group_id = g.id
+            ),
+            '[]'::json
+        )
+    )
+    from group_members gm
+    join groups g on g.id = gm.group_id
+    where gm.discord_id = p_discord_id and g.guild_id = p_guild_id
+    limit 1;
+$$;
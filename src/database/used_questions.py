@@ -0,0 +1,55 @@
+import json
+import os
+import tempfile
+from typing import Optional, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class UsedQuestionStore:
+    """Local snapshot of used question slugs and the last daily_questions id seen"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.slugs: Set[str] = set()
+        self.last_id = 0
+
+    def load(self):
+        """Load the snapshot from disk if it exists"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.slugs = set(data["slugs"])
+            self.last_id = data["last_id"]
+        except Exception as e:
+            logger.error(f"Error loading used questions: {e}")
+
+    def save(self):
+        """Write the snapshot to disk"""
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # A temp name per write, so processes sharing the file never collide
+            with tempfile.NamedTemporaryFile(
+                "w",
+                encoding="utf-8",
+                dir=directory or ".",
+                prefix=f"{os.path.basename(self.path)}.",
+                suffix=".tmp",
+                delete=False,
+            ) as f:
+                json.dump({"last_id": self.last_id, "slugs": sorted(self.slugs)}, f)
+            os.replace(f.name, self.path)
+        except Exception as e:
+            logger.error(f"Error saving used questions: {e}")
+
+    def add(self, question_id: int, slug: str):
+        """Record a used slug and its daily_questions id"""
+        self.slugs.add(slug)
+        self.last_id = max(self.last_id, question_id)
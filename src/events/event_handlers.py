@@ -3,6 +3,7 @@ from discord.ext import commands
 import logging
 from typing import TYPE_CHECKING
 from src.ui.views import WelcomeView
+from src.services.profiler import profiled
 
 if TYPE_CHECKING:
     from bot.leetcode_bot import LeetCodeBot
@@ -20,16 +21,16 @@ class EventHandlers(commands.Cog):
     async def on_ready(self):
         """Bot ready event"""
         logger.info(f"{self.bot.user} has landed!")
-        await self.bot.leetcode_service.init_session()
         self.bot.scheduled_tasks.start_all_tasks()
 
     @commands.Cog.listener()
+    @profiled("listener on_member_join")
     async def on_member_join(self, member: discord.Member):
         """Handle new member joining the server"""
         try:
             # Check if user is already registered
             user_id = str(member.id)
-            existing_user = self.bot.db.get_user(user_id)
+            existing_user = await self.bot.db.get_user(user_id)
 
             if existing_user:
                 # User is already registered
@@ -43,6 +44,19 @@ class EventHandlers(commands.Cog):
                     value=existing_user["leetcode_username"],
                     inline=False,
                 )
+
+                # Groups are per server, so they may not have one here yet
+                group = await self.bot.group_service.ensure_user_group(
+                    member, member.guild
+                )
+                if group:
+                    self.bot.leaderboard.set_user_group(
+                        user_id, str(member.guild.id), group["id"]
+                    )
+                    embed.add_field(
+                        name="Your Group", value=group["name"], inline=False
+                    )
+
                 embed.add_field(
                     name="Quick Commands",
                     value="`!profile` - View your stats\n`!leaderboard` - See rankings",
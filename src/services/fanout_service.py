@@ -0,0 +1,80 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Optional, List, Iterable
+import discord
+import logging
+from src.services.metrics import DISCORD_SEND_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DeliveryResult:
+    """Outcome of sending one message to one channel"""
+
+    channel_id: int
+    latency: float
+    error: Optional[Exception] = None
+
+    @property
+    def delivered(self) -> bool:
+        return self.error is None
+
+
+class FanoutDispatcher:
+    """Sends the same message to many channels concurrently
+
+    discord.py already waits out per-route and global rate limits, so the
+    semaphore only caps how many sends are queued against those buckets.
+    """
+
+    def __init__(self, concurrency: int = 25):
+        self.concurrency = concurrency
+
+    async def send(
+        self,
+        channels: Iterable[discord.abc.Messageable],
+        content: Optional[str] = None,
+        embed: Optional[discord.Embed] = None,
+    ) -> List[DeliveryResult]:
+        """Send to every channel, latency is measured from dispatch start"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.perf_counter()
+
+        async def deliver(channel) -> DeliveryResult:
+            async with semaphore:
+                try:
+                    await channel.send(content, embed=embed)
+                    error = None
+                except Exception as e:
+                    error = e
+            return DeliveryResult(channel.id, time.perf_counter() - started, error)
+
+        results = await asyncio.gather(*(deliver(channel) for channel in channels))
+        self._log_results(results)
+        return results
+
+    def _log_results(self, results: List[DeliveryResult]):
+        """Log per-channel failures and a latency summary"""
+        if not results:
+            return
+
+        for result in results:
+            if not result.delivered:
+                logger.error(
+                    f"Failed to deliver to channel {result.channel_id}: {result.error}"
+                )
+
+        latencies = sorted(r.latency for r in results if r.delivered)
+        for latency in latencies:
+            DISCORD_SEND_SECONDS.observe(latency)
+        delivered = len(latencies)
+        if latencies:
+            p50 = latencies[len(latencies) // 2]
+            logger.info(
+                f"Delivered to {delivered}/{len(results)} channels, "
+                f"p50 {p50:.2f}s, last {latencies[-1]:.2f}s"
+            )
+        else:
+            logger.warning(f"Delivered to 0/{len(results)} channels")
@@ -0,0 +1,212 @@
+import asyncio
+import gzip
+import json
+import zlib
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _exchange_key(query: str, variables: Dict[str, Any]) -> Tuple[str, str]:
+    return query, json.dumps(variables, sort_keys=True)
+
+
+class GraphQLRecorder:
+    """Captures GraphQL requests, responses and latencies to a gzipped file
+
+    Each line is a JSON record. Query texts are written once per gzip member
+    and referenced by index, since the same few queries repeat with different
+    variables. Records are buffered and appended as a complete member from a
+    writer thread every FLUSH_RECORDS records or FLUSH_INTERVAL seconds, so a
+    crash loses at most one batch and never blocks the event loop.
+    """
+
+    FLUSH_RECORDS = 500
+    FLUSH_INTERVAL = 5.0
+
+    def __init__(self, path: str):
+        self.path = path
+        self.recorded = 0
+        self._queries: Dict[str, int] = {}
+        self._lines: List[str] = []
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        # One worker keeps members in the order their batches were cut
+        self._writer = ThreadPoolExecutor(max_workers=1)
+
+    def record(
+        self,
+        query: str,
+        variables: Dict[str, Any],
+        status: int,
+        latency: float,
+        body: Optional[Any] = None,
+        retry_after: Optional[str] = None,
+    ):
+        """Buffer one request attempt and its response"""
+        try:
+            query_id = self._queries.get(query)
+            if query_id is None:
+                query_id = self._queries[query] = len(self._queries)
+                self._add({"query_id": query_id, "query": query})
+
+            exchange = {
+                "q": query_id,
+                "v": variables,
+                "s": status,
+                "l": round(latency, 4),
+                "b": body,
+            }
+            if retry_after is not None:
+                exchange["r"] = retry_after
+            self._add(exchange)
+            self.recorded += 1
+
+            if len(self._lines) >= self.FLUSH_RECORDS:
+                self.flush()
+            elif self._flush_timer is None:
+                self._flush_timer = asyncio.get_running_loop().call_later(
+                    self.FLUSH_INTERVAL, self.flush
+                )
+        except Exception as e:
+            logger.error(f"Error recording GraphQL exchange: {e}")
+
+    def _add(self, record: Dict[str, Any]):
+        self._lines.append(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def flush(self) -> Future:
+        """Hand the buffered records to the writer thread as one gzip member"""
+        if self._flush_timer:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        lines, self._lines = self._lines, []
+        # Query ids restart in the next gzip member
+        self._queries.clear()
+        return self._writer.submit(self._append, lines)
+
+    def _append(self, lines: List[str]):
+        if not lines:
+            return
+        try:
+            # Appending adds a gzip member, which reads back as one stream
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.writelines(lines)
+        except Exception as e:
+            logger.error(f"Error writing GraphQL capture: {e}")
+
+    def close(self):
+        """Write any buffered records and stop the writer"""
+        self.flush()
+        self._writer.shutdown(wait=True)
+        logger.info(f"Recorded {self.recorded} GraphQL exchanges to {self.path}")
+
+
+class _ReplayResponse:
+    def __init__(self, exchange: Dict[str, Any]):
+        self.status = exchange["s"]
+        self.headers = {}
+        if exchange.get("r") is not None:
+            self.headers["Retry-After"] = exchange["r"]
+        self._body = exchange.get("b")
+
+    async def json(self):
+        return self._body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class _ReplaySession:
+    def __init__(self, client: "ReplayHttpClient"):
+        self.client = client
+        self.closed = False
+
+    def post(self, url: str, json: Dict[str, Any], **kwargs):
+        variables = json.get("variables") or {}
+        return _ReplayContext(self.client._respond(json["query"], variables))
+
+
+class _ReplayContext:
+    def __init__(self, response):
+        self._response = response
+
+    async def __aenter__(self):
+        return await self._response
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class ReplayHttpClient:
+    """Stands in for HttpClient, answering from a GraphQLRecorder capture
+
+    Identical requests replay their recorded attempts in order, the last one
+    repeating once they run out. Requests missing from the capture get a 404
+    with a GraphQL error, which is not retried. `speed` scales the recorded latencies, 2.0
+    replays twice as fast and 0 without any delay.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0):
+        self.path = path
+        self.speed = speed
+        self.session: Optional[_ReplaySession] = None
+        self._exchanges: Dict[Tuple[str, str], deque] = defaultdict(deque)
+        self._stats = {"requests": 0, "replayed": 0, "unmatched": 0}
+
+    async def start(self):
+        """Load the capture, must be called from inside the event loop"""
+        if self.session and not self.session.closed:
+            return
+
+        await asyncio.to_thread(self._load)
+        self.session = _ReplaySession(self)
+        logger.info(
+            f"Replaying {sum(len(e) for e in self._exchanges.values())} "
+            f"GraphQL exchanges from {self.path}"
+        )
+
+    async def close(self):
+        if self.session:
+            self.session.closed = True
+            self.session = None
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self._stats)
+
+    def _load(self):
+        self._exchanges.clear()
+        queries: Dict[int, str] = {}
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A partial last line from a writer that was killed
+                        continue
+                    if "query" in record:
+                        queries[record["query_id"]] = record["query"]
+                        continue
+                    key = _exchange_key(queries[record["q"]], record["v"])
+                    self._exchanges[key].append(record)
+        except (EOFError, gzip.BadGzipFile, zlib.error) as e:
+            logger.warning(f"Capture {self.path} is truncated, replaying the rest: {e}")
+
+    async def _respond(self, query: str, variables: Dict[str, Any]) -> _ReplayResponse:
+        self._stats["requests"] += 1
+        exchanges = self._exchanges.get(_exchange_key(query, variables))
+        if not exchanges:
+            self._stats["unmatched"] += 1
+            message = f"No recorded response for variables {variables}"
+            return _ReplayResponse({"s": 404, "b": {"errors": [{"message": message}]}})
+
+        exchange = exchanges.popleft() if len(exchanges) > 1 else exchanges[0]
+        if self.speed > 0:
+            await asyncio.sleep(exchange["l"] / self.speed)
+        self._stats["replayed"] += 1
+        return _ReplayResponse(exchange)
@@ -1,3 +1,5 @@
+import asyncio
+from collections import defaultdict
 import discord
 from typing import Optional, Dict, Any
 import logging
@@ -12,49 +14,29 @@ class GroupService:
     def __init__(self, db: DatabaseManager, max_group_size: int = 5):
         self.db = db
         self.max_group_size = max_group_size
+        # Serializes group creation per guild so concurrent joins don't each
+        # open a group, while guilds don't wait on each other
+        self._create_locks: Dict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
 
     async def assign_user_to_group(
         self, user: discord.Member, guild: discord.Guild
     ) -> Optional[Dict[str, Any]]:
-        """Assign user to a group (max 5 per group)"""
+        """Assign user to a group in the guild (max 5 per group)"""
         try:
             if not guild:
                 logger.error("Guild is None in assign_user_to_group")
                 return None
 
-            # Find available group or create new one
-            groups = self.db.get_all_groups()
-            available_group = None
-
-            for group in groups:
-                member_count = len(self.db.get_group_members(group["id"]))
-                if member_count < self.max_group_size:
-                    available_group = group
-                    break
+            # Claim a slot in a group with room, in a single request
+            available_group = await self.db.claim_group_slot(
+                str(user.id), self.max_group_size, str(guild.id)
+            )
 
             if not available_group:
-                # Create new group
-                group_name = f"Group-{len(groups) + 1}"
-                available_group = self.db.create_group(group_name)
-
+                available_group = await self._create_group_with_member(guild, user)
                 if not available_group:
-                    logger.error("Failed to create new group")
                     return None
 
-                # Create Discord channel for the group
-                channel = await self._create_group_channel(
-                    guild, available_group["name"]
-                )
-                if channel:
-                    self.db.update_group_channel(available_group["id"], str(channel.id))
-                    available_group["channel_id"] = str(channel.id)
-
-            # Add user to group
-            success = self.db.add_member_to_group(available_group["id"], str(user.id))
-            if not success:
-                logger.error("Failed to add user to group")
-                return None
-
             # Add user to Discord channel
             if available_group.get("channel_id"):
                 await self._add_user_to_channel(
@@ -71,6 +53,58 @@ class GroupService:
             logger.error(f"Error assigning user to group: {e}")
             return None
 
+    async def ensure_user_group(
+        self, user: discord.Member, guild: discord.Guild
+    ) -> Optional[Dict[str, Any]]:
+        """Get the user's group in the guild, assigning one if they have none
+
+        Users are global but groups are per guild, so a registered user
+        joining another guild still needs a group there.
+        """
+        group = await self.db.get_user_group(str(user.id), str(guild.id))
+        if group:
+            return group
+        return await self.assign_user_to_group(user, guild)
+
+    async def _create_group_with_member(
+        self, guild: discord.Guild, user: discord.Member
+    ) -> Optional[Dict[str, Any]]:
+        """Create a new group and channel, then add the user to it"""
+        guild_id = str(guild.id)
+        async with self._create_locks[guild.id]:
+            # Another join may have opened a group while we waited
+            available_group = await self.db.claim_group_slot(
+                str(user.id), self.max_group_size, guild_id
+            )
+            if available_group:
+                return available_group
+
+            # Create new group, numbered within the guild
+            group_name = f"Group-{await self.db.get_group_count(guild_id) + 1}"
+            available_group = await self.db.create_group(group_name, guild_id)
+
+            if not available_group:
+                logger.error("Failed to create new group")
+                return None
+
+            # Create Discord channel for the group
+            channel = await self._create_group_channel(guild, available_group["name"])
+            if channel:
+                await self.db.update_group_channel(
+                    available_group["id"], str(channel.id)
+                )
+                available_group["channel_id"] = str(channel.id)
+
+            # Add user to group
+            success = await self.db.add_member_to_group(
+                available_group["id"], str(user.id), guild_id
+            )
+            if not success:
+                logger.error("Failed to add user to group")
+                return None
+
+            return available_group
+
     async def _create_group_channel(
         self, guild: discord.Guild, group_name: str
     ) -> Optional[discord.TextChannel]:
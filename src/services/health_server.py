@@ -0,0 +1,156 @@
+import asyncio
+import math
+from aiohttp import web
+from typing import Optional, TYPE_CHECKING
+import logging
+from src.services.metrics import REGISTRY
+
+if TYPE_CHECKING:
+    from src.bot.leetcode_bot import LeetCodeBot
+    from src.bot.scheduler_worker import SchedulerWorker
+
+logger = logging.getLogger(__name__)
+
+
+def _finite(latency: float) -> Optional[float]:
+    """Latency rounded for JSON, None before the first heartbeat (inf)"""
+    return round(latency, 4) if math.isfinite(latency) else None
+
+
+class HealthServer:
+    """HTTP health endpoints served from the bot's own event loop"""
+
+    def __init__(
+        self,
+        bot: "LeetCodeBot",
+        host: str = "0.0.0.0",
+        port: int = 8080,
+        max_loop_lag: float = 1.0,
+        lag_interval: float = 1.0,
+    ):
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self.max_loop_lag = max_loop_lag
+        self.lag_interval = lag_interval
+        self.loop_lag = 0.0
+        self.app = web.Application()
+        self.app.router.add_get("/", self.index)
+        self.app.router.add_get("/healthz", self.healthz)
+        self.app.router.add_get("/readyz", self.readyz)
+        self.app.router.add_get("/metrics", self.metrics)
+        self._runner: Optional[web.AppRunner] = None
+        self._lag_monitor: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start serving and measuring event loop lag"""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self._lag_monitor = asyncio.create_task(self._monitor_loop_lag())
+        logger.info(f"Health server listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        """Stop serving"""
+        if self._lag_monitor:
+            self._lag_monitor.cancel()
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def _monitor_loop_lag(self):
+        """Measure how late a fixed sleep wakes up"""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.lag_interval)
+            self.loop_lag = max(0.0, loop.time() - started - self.lag_interval)
+
+    def _gateway_connected(self) -> bool:
+        """is_ready() stays True across disconnects, so check every shard too"""
+        if not self.bot.is_ready() or self.bot.is_closed():
+            return False
+        return not any(shard.is_closed() for shard in self.bot.shards.values())
+
+    def _scoring_status(self) -> dict:
+        last_run = self.bot.scheduled_tasks.last_scoring_run
+        return {
+            "last_scoring_run": last_run.isoformat() if last_run else None,
+            "last_scoring_stats": self.bot.scheduled_tasks.last_scoring_stats,
+        }
+
+    async def index(self, request: web.Request) -> web.Response:
+        return web.Response(text="Bot is running!")
+
+    async def healthz(self, request: web.Request) -> web.Response:
+        """Liveness: gateway connected and event loop responsive"""
+        gateway_connected = self._gateway_connected()
+        healthy = gateway_connected and self.loop_lag < self.max_loop_lag
+        body = {
+            "status": "ok" if healthy else "unhealthy",
+            "gateway_connected": gateway_connected,
+            "gateway_latency": (
+                _finite(self.bot.latency) if gateway_connected else None
+            ),
+            "shard_latencies": (
+                {
+                    str(shard_id): _finite(latency)
+                    for shard_id, latency in self.bot.latencies
+                }
+                if gateway_connected
+                else None
+            ),
+            "loop_lag": round(self.loop_lag, 4),
+            **self._scoring_status(),
+        }
+        return web.json_response(body, status=200 if healthy else 503)
+
+    async def readyz(self, request: web.Request) -> web.Response:
+        """Readiness: connected and caches loaded"""
+        checks = {
+            "gateway": self._gateway_connected(),
+            "leaderboard": self.bot.leaderboard.ready,
+            "http_client": self.bot.http_client.session is not None,
+        }
+        ready = all(checks.values())
+        body = {"status": "ready" if ready else "not ready", "checks": checks}
+        return web.json_response(body, status=200 if ready else 503)
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        """Prometheus text exposition of every registered metric"""
+        return web.Response(
+            text=REGISTRY.render(), content_type="text/plain", charset="utf-8"
+        )
+
+
+class WorkerHealthServer(HealthServer):
+    """Health endpoints for the scheduler worker, which opens no gateway session"""
+
+    bot: "SchedulerWorker"
+
+    def _logged_in(self) -> bool:
+        return self.bot.user is not None and not self.bot.is_closed()
+
+    async def index(self, request: web.Request) -> web.Response:
+        return web.Response(text="Scheduler worker is running!")
+
+    async def healthz(self, request: web.Request) -> web.Response:
+        """Liveness: logged in and event loop responsive"""
+        logged_in = self._logged_in()
+        healthy = logged_in and self.loop_lag < self.max_loop_lag
+        body = {
+            "status": "ok" if healthy else "unhealthy",
+            "logged_in": logged_in,
+            "loop_lag": round(self.loop_lag, 4),
+            **self._scoring_status(),
+        }
+        return web.json_response(body, status=200 if healthy else 503)
+
+    async def readyz(self, request: web.Request) -> web.Response:
+        """Readiness: logged in and the HTTP pool open"""
+        checks = {
+            "logged_in": self._logged_in(),
+            "http_client": self.bot.http_client.session is not None,
+        }
+        ready = all(checks.values())
+        body = {"status": "ready" if ready else "not ready", "checks": checks}
+        return web.json_response(body, status=200 if ready else 503)
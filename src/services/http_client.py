@@ -0,0 +1,93 @@
+import aiohttp
+from typing import Optional, Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClient:
+    """Shared aiohttp session with a tuned connection pool"""
+
+    def __init__(
+        self,
+        pool_size: int = 100,
+        per_host_limit: int = 50,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 15.0,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 60.0,
+    ):
+        self.pool_size = pool_size
+        self.per_host_limit = per_host_limit
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._stats = {
+            "requests": 0,
+            "in_flight": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "dns_cache_hits": 0,
+            "dns_cache_misses": 0,
+        }
+
+    async def start(self):
+        """Create the session, must be called from inside the event loop"""
+        if self.session and not self.session.closed:
+            return
+
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.per_host_limit,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        timeout = aiohttp.ClientTimeout(
+            sock_connect=self.connect_timeout, sock_read=self.read_timeout
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            trace_configs=[self._trace_config()],
+        )
+        logger.info(
+            f"HTTP client started (pool {self.pool_size}, "
+            f"per host {self.per_host_limit})"
+        )
+
+    async def close(self):
+        """Close the session and its connections"""
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for sizing the pool against concurrent load"""
+        return {
+            **self._stats,
+            "pool_size": self.pool_size,
+            "per_host_limit": self.per_host_limit,
+        }
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        """Hook request and connection events into the stats counters"""
+        stats = self._stats
+
+        def counter(name: str, delta: int = 1):
+            async def hook(session, context, params):
+                stats[name] += delta
+
+            return hook
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(counter("requests"))
+        trace_config.on_request_start.append(counter("in_flight"))
+        trace_config.on_request_end.append(counter("in_flight", -1))
+        trace_config.on_request_exception.append(counter("in_flight", -1))
+        trace_config.on_connection_create_end.append(counter("connections_created"))
+        trace_config.on_connection_reuseconn.append(counter("connections_reused"))
+        trace_config.on_dns_cache_hit.append(counter("dns_cache_hits"))
+        trace_config.on_dns_cache_miss.append(counter("dns_cache_misses"))
+        return trace_config
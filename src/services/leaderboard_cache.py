@@ -0,0 +1,355 @@
+import asyncio
+import bisect
+from collections import Counter
+from typing import Optional, Dict, Any, List, Iterable, Set, Tuple
+import logging
+from src.database.database_manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# Above this many users, score changes rebuild the indexes with one sort
+BULK_UPDATE_THRESHOLD = 256
+# Rebuilds interrupted by this many concurrent changes finish on the loop
+REBUILD_ATTEMPTS = 3
+
+
+class RankedScores:
+    """Scores kept in descending order for top-N reads"""
+
+    def __init__(self):
+        # Sorted (-score, key) pairs, so ties break on key
+        self._entries: List[Tuple[int, str]] = []
+        self._scores: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @classmethod
+    def from_scores(cls, scores: Dict[str, int]) -> "RankedScores":
+        """Build from many scores with one sort instead of an insort each"""
+        ranked = cls()
+        ranked._scores = dict(scores)
+        ranked._entries = sorted((-score, key) for key, score in scores.items())
+        return ranked
+
+    def set(self, key: str, score: int):
+        self.remove(key)
+        self._scores[key] = score
+        bisect.insort(self._entries, (-score, key))
+
+    def remove(self, key: str):
+        score = self._scores.pop(key, None)
+        if score is None:
+            return
+        position = bisect.bisect_left(self._entries, (-score, key))
+        del self._entries[position]
+
+    def top(self, limit: Optional[int] = None) -> List[str]:
+        entries = self._entries if limit is None else self._entries[:limit]
+        return [key for _, key in entries]
+
+
+class FenwickRankIndex:
+    """Count of users per score in a Fenwick tree, for O(log n) rank queries"""
+
+    def __init__(self, capacity: int = 1024):
+        # Capacity stays a power of two so the tree can grow in place
+        self._capacity = 1
+        while self._capacity < capacity:
+            self._capacity *= 2
+        self._tree = [0] * (self._capacity + 1)
+        self.total = 0
+
+    @classmethod
+    def from_scores(cls, scores: Iterable[int]) -> "FenwickRankIndex":
+        """Build from many scores in linear time"""
+        counts = Counter(max(score, 0) for score in scores)
+        index = cls(max(1024, max(counts, default=0) + 1))
+        tree = index._tree
+        for score, count in counts.items():
+            tree[score + 1] += count
+        # Push each node's sum up to its parent once
+        for i in range(1, index._capacity + 1):
+            parent = i + (i & -i)
+            if parent <= index._capacity:
+                tree[parent] += tree[i]
+        index.total = sum(counts.values())
+        return index
+
+    def _grow(self, score: int):
+        while score >= self._capacity:
+            # The new root covers everything counted so far, the rest is empty
+            self._tree.extend([0] * self._capacity)
+            self._capacity *= 2
+            self._tree[self._capacity] = self.total
+
+    def add(self, score: int, delta: int = 1):
+        """Add `delta` users with the given score"""
+        score = max(score, 0)
+        self._grow(score)
+        self.total += delta
+        i = score + 1
+        while i <= self._capacity:
+            self._tree[i] += delta
+            i += i & -i
+
+    def count_at_most(self, score: int) -> int:
+        """Number of users with a score of at most `score`"""
+        if score < 0:
+            return 0
+        i = min(score + 1, self._capacity)
+        count = 0
+        while i > 0:
+            count += self._tree[i]
+            i -= i & -i
+        return count
+
+    def rank(self, score: int) -> int:
+        """1-based rank of a score, tied scores share a rank"""
+        return self.total - self.count_at_most(score) + 1
+
+
+def _build_indexes(
+    users: Dict[str, Dict[str, Any]],
+    user_groups: Dict[str, Dict[str, int]],
+    fields: Iterable[str],
+):
+    """Build (monthly, weekly_by_group, ranks) from rows, one sort per index"""
+    members_by_group: Dict[int, Dict[str, int]] = {}
+    for discord_id, groups in user_groups.items():
+        user = users.get(discord_id)
+        for group_id in groups.values():
+            members = members_by_group.setdefault(group_id, {})
+            if user:
+                members[discord_id] = user["weekly_score"]
+
+    monthly = RankedScores.from_scores(
+        {key: user["monthly_score"] for key, user in users.items()}
+    )
+    weekly_by_group = {
+        group_id: RankedScores.from_scores(members)
+        for group_id, members in members_by_group.items()
+    }
+    ranks = {
+        field: FenwickRankIndex.from_scores(user[field] for user in users.values())
+        for field in fields
+    }
+    return monthly, weekly_by_group, ranks
+
+
+def _add_points(users: Dict[str, Dict[str, Any]], discord_ids: List[str], points: int):
+    """Replace the rows of the given users with their scores raised"""
+    for discord_id in discord_ids:
+        user = users.get(discord_id)
+        if user:
+            users[discord_id] = {
+                **user,
+                "monthly_score": user["monthly_score"] + points,
+                "weekly_score": user["weekly_score"] + points,
+            }
+
+
+def _overlay(
+    users: Dict[str, Dict[str, Any]],
+    user_groups: Dict[str, Dict[str, int]],
+    pending: Dict[str, Tuple[Optional[Dict[str, Any]], Optional[Dict[str, int]]]],
+):
+    """Copy newer rows and groups over a snapshot"""
+    for discord_id, (user, groups) in pending.items():
+        if user:
+            users[discord_id] = user
+        if groups:
+            user_groups[discord_id] = groups
+
+
+class LeaderboardCache:
+    """In-memory leaderboards, built once and updated as scores change
+
+    Full rebuilds run in a worker thread on copies of the rows and are
+    swapped in at once, so the event loop never stalls on sorting.
+    """
+
+    def __init__(self, db: DatabaseManager):
+        self.db = db
+        self.ready = False
+        self.users: Dict[str, Dict[str, Any]] = {}
+        # discord_id -> guild_id -> group_id, a user has one group per guild.
+        # Rows and inner dicts are replaced, never mutated, so copies stay valid
+        self.user_groups: Dict[str, Dict[str, int]] = {}
+        self.monthly = RankedScores()
+        self.weekly_by_group: Dict[int, RankedScores] = {}
+        self.ranks = {
+            "monthly_score": FenwickRankIndex(),
+            "weekly_score": FenwickRankIndex(),
+        }
+        # Bumped on every incremental change, to detect them during a rebuild
+        self._version = 0
+        # Users changed while build() runs, replayed over its snapshot
+        self._changed: Optional[Set[str]] = None
+        self._build_lock = asyncio.Lock()
+
+    async def build(self):
+        """Load every user and group membership from the database
+
+        Changes made while loading are at least as new as the rows read, so
+        they are replayed over the snapshot instead of being lost.
+        """
+        async with self._build_lock:
+            self._changed = set()
+            try:
+                users, user_groups = await self._load()
+                indexes = await asyncio.to_thread(
+                    _build_indexes, users, user_groups, list(self.ranks)
+                )
+                # Too many to replay one by one, fold them in and rebuild
+                attempts = 0
+                while len(self._changed) > BULK_UPDATE_THRESHOLD:
+                    _overlay(users, user_groups, self._pending(self._changed))
+                    self._changed = set()
+                    attempts += 1
+                    if attempts < REBUILD_ATTEMPTS:
+                        indexes = await asyncio.to_thread(
+                            _build_indexes, users, user_groups, list(self.ranks)
+                        )
+                    else:
+                        indexes = _build_indexes(users, user_groups, list(self.ranks))
+                pending = self._pending(self._changed)
+            finally:
+                self._changed = None
+
+            self._swap(users, user_groups, indexes)
+            self._replay(pending)
+            self.ready = True
+            logger.info(f"Leaderboard cache built with {len(self.users)} users")
+
+    async def _load(self):
+        users = await self.db.get_all_users()
+        memberships = await self.db.get_all_group_members()
+
+        user_groups: Dict[str, Dict[str, int]] = {}
+        for member in memberships:
+            guild_id = (member.get("groups") or {}).get("guild_id")
+            user_groups.setdefault(member["discord_id"], {})[guild_id] = member[
+                "group_id"
+            ]
+        return {user["discord_id"]: dict(user) for user in users}, user_groups
+
+    def _pending(self, discord_ids: Iterable[str]):
+        """Current rows and groups of the given users"""
+        return {
+            discord_id: (self.users.get(discord_id), self.user_groups.get(discord_id))
+            for discord_id in discord_ids
+        }
+
+    def _replay(self, pending):
+        for discord_id, (user, groups) in pending.items():
+            for guild_id, group_id in (groups or {}).items():
+                if self.get_user_group_id(discord_id, guild_id) != group_id:
+                    self.set_user_group(discord_id, guild_id, group_id)
+            if user and self.users.get(discord_id) != user:
+                self.upsert_user(user)
+
+    def _touch(self, discord_ids: Iterable[str]):
+        self._version += 1
+        if self._changed is not None:
+            self._changed.update(discord_ids)
+
+    def _swap(self, users, user_groups, indexes, changed: Iterable[str] = ()):
+        self.users, self.user_groups = users, user_groups
+        self.monthly, self.weekly_by_group, self.ranks = indexes
+        self._touch(changed)
+
+    def upsert_user(self, user: Dict[str, Any]):
+        """Add or replace a user row"""
+        discord_id = user["discord_id"]
+        old_user = self.users.get(discord_id)
+        for field, ranks in self.ranks.items():
+            if old_user:
+                ranks.add(old_user[field], -1)
+            ranks.add(user[field])
+
+        self.users[discord_id] = dict(user)
+        self.monthly.set(discord_id, user["monthly_score"])
+        for group_id in self.user_groups.get(discord_id, {}).values():
+            self.weekly_by_group[group_id].set(discord_id, user["weekly_score"])
+        self._touch([discord_id])
+
+    def update_username(self, discord_id: str, leetcode_username: str):
+        user = self.users.get(discord_id)
+        if user:
+            self.users[discord_id] = {**user, "leetcode_username": leetcode_username}
+            self._touch([discord_id])
+
+    def set_user_group(self, discord_id: str, guild_id: str, group_id: int):
+        """Record a user's group membership in a guild"""
+        groups = self.user_groups.get(discord_id, {})
+        old_group_id = groups.get(guild_id)
+        if old_group_id is not None:
+            self.weekly_by_group[old_group_id].remove(discord_id)
+
+        self.user_groups[discord_id] = {**groups, guild_id: group_id}
+        user = self.users.get(discord_id)
+        weekly = self.weekly_by_group.setdefault(group_id, RankedScores())
+        if user:
+            weekly.set(discord_id, user["weekly_score"])
+        self._touch([discord_id])
+
+    async def add_points(self, discord_ids: Iterable[str], points: int):
+        """Mirror a score increment applied in the database"""
+        discord_ids = list(discord_ids)
+        if len(discord_ids) <= BULK_UPDATE_THRESHOLD:
+            for discord_id in discord_ids:
+                user = self.users.get(discord_id)
+                if not user:
+                    continue
+                self.upsert_user(
+                    {
+                        **user,
+                        "monthly_score": user["monthly_score"] + points,
+                        "weekly_score": user["weekly_score"] + points,
+                    }
+                )
+            return
+
+        # One rebuild off the loop beats an O(n) insort per user. Changes made
+        # while it runs would be lost, so it starts over from the new rows
+        for _ in range(REBUILD_ATTEMPTS):
+            version = self._version
+            users, user_groups = dict(self.users), dict(self.user_groups)
+            _add_points(users, discord_ids, points)
+            indexes = await asyncio.to_thread(
+                _build_indexes, users, user_groups, list(self.ranks)
+            )
+            if self._version == version:
+                self._swap(users, user_groups, indexes, discord_ids)
+                return
+
+        users, user_groups = dict(self.users), dict(self.user_groups)
+        _add_points(users, discord_ids, points)
+        indexes = _build_indexes(users, user_groups, list(self.ranks))
+        self._swap(users, user_groups, indexes, discord_ids)
+
+    def get_monthly_leaderboard(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Top users by monthly score"""
+        return [self.users[key] for key in self.monthly.top(limit)]
+
+    def get_rank(
+        self, discord_id: str, score_field: str = "monthly_score"
+    ) -> Optional[Tuple[int, int, int]]:
+        """Return (rank, total users, score) for a user across all users"""
+        user = self.users.get(discord_id)
+        if not user:
+            return None
+        ranks = self.ranks[score_field]
+        score = user[score_field]
+        return ranks.rank(score), ranks.total, score
+
+    def get_user_group_id(self, discord_id: str, guild_id: str) -> Optional[int]:
+        return self.user_groups.get(discord_id, {}).get(guild_id)
+
+    def get_group_weekly_leaderboard(self, group_id: int) -> List[Dict[str, Any]]:
+        """Members of a group ordered by weekly score"""
+        weekly = self.weekly_by_group.get(group_id)
+        if not weekly:
+            return []
+        return [self.users[key] for key in weekly.top()]
@@ -1,30 +1,177 @@
 import aiohttp
+import asyncio
+import json
 import random
-from typing import Optional, Dict, Any, List
+import re
+import time
+from typing import Optional, Dict, Any, List, Tuple
 import logging
+from src.services.graphql_recorder import GraphQLRecorder
+from src.services.http_client import HttpClient
+from src.services.metrics import LEETCODE_REQUESTS, LEETCODE_REQUEST_SECONDS
+from src.services.profiler import phase
+from src.services.rate_limiter import TokenBucket
+from src.services.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+OPERATION_NAME = re.compile(r"query\s+(\w+)")
+
+
+class LeetCodeAPIError(Exception):
+    """Raised when a LeetCode GraphQL request fails after all retries"""
+
 
 class LeetCodeService:
     """Handles LeetCode API interactions"""
 
-    def __init__(self):
-        self.session: Optional[aiohttp.ClientSession] = None
+    def __init__(
+        self,
+        http_client: Optional[HttpClient] = None,
+        requests_per_second: float = 5.0,
+        burst: int = 10,
+        max_retries: int = 4,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0,
+        username_cache_size: int = 10000,
+        username_ttl: float = 86400,
+        missing_username_ttl: float = 300,
+        submission_batch_size: int = 20,
+        recorder: Optional[GraphQLRecorder] = None,
+    ):
+        self.http_client = http_client or HttpClient()
+        self.recorder = recorder
         self.base_url = "https://leetcode.com/graphql"
+        # Shared by every GraphQL call so concurrent callers share one budget
+        self.rate_limiter = TokenBucket(requests_per_second, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.submission_batch_size = submission_batch_size
+        # Usernames rarely disappear, but typos may be registered soon after
+        self.username_cache = TTLCache(username_cache_size)
+        self.username_ttl = username_ttl
+        self.missing_username_ttl = missing_username_ttl
+        # Identical requests in flight, keyed on query and variables
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    @property
+    def session(self) -> Optional[aiohttp.ClientSession]:
+        return self.http_client.session
 
     async def init_session(self):
         """Initialize aiohttp session"""
-        if not self.session:
-            self.session = aiohttp.ClientSession()
+        await self.http_client.start()
 
     async def close_session(self):
         """Close aiohttp session"""
-        if self.session:
-            await self.session.close()
+        await self.http_client.close()
+        if self.recorder:
+            self.recorder.close()
+
+    async def _post(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a GraphQL request, sharing one response among identical calls"""
+        key = (query, json.dumps(variables, sort_keys=True))
+        request = self._inflight.get(key)
+        if request is None:
+            request = asyncio.ensure_future(self._send(query, variables))
+            self._inflight[key] = request
+            request.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one caller giving up doesn't cancel it for the others
+        with phase("leetcode"):
+            return await asyncio.shield(request)
+
+    async def _send(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a GraphQL request and record its latency"""
+        match = OPERATION_NAME.search(query)
+        operation = match.group(1) if match else "anonymous"
+        with LEETCODE_REQUEST_SECONDS.time(operation=operation):
+            return await self._send_with_retries(query, variables, operation)
+
+    async def _send_with_retries(
+        self, query: str, variables: Dict[str, Any], operation: str
+    ) -> Dict[str, Any]:
+        """Send a rate-limited GraphQL request, retrying throttling and errors"""
+        payload = {"query": query, "variables": variables}
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire()
+            retry_after = None
+            started = time.perf_counter()
+            try:
+                async with self.session.post(
+                    self.base_url,
+                    json=payload,
+                    headers={"Content-Type": "application/json"},
+                ) as response:
+                    if response.status not in RETRY_STATUSES:
+                        # HTML error pages raise ContentTypeError and are retried
+                        data = await response.json()
+                        LEETCODE_REQUESTS.inc(operation=operation, outcome="ok")
+                        if self.recorder:
+                            self.recorder.record(
+                                query,
+                                variables,
+                                response.status,
+                                time.perf_counter() - started,
+                                data,
+                            )
+                        return data
+
+                    if self.recorder:
+                        self.recorder.record(
+                            query,
+                            variables,
+                            response.status,
+                            time.perf_counter() - started,
+                            retry_after=response.headers.get("Retry-After"),
+                        )
+                    retry_after = self._parse_retry_after(
+                        response.headers.get("Retry-After")
+                    )
+                    error = f"HTTP {response.status}"
+                    outcome = f"http_{response.status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = repr(e)
+                outcome = type(e).__name__
+
+            LEETCODE_REQUESTS.inc(operation=operation, outcome=outcome)
+
+            if attempt >= self.max_retries:
+                raise LeetCodeAPIError(
+                    f"GraphQL request failed after {attempt + 1} attempts: {error}"
+                )
+
+            if retry_after is not None:
+                # Hold back every caller, not just this one
+                self.rate_limiter.pause(retry_after)
+                delay = retry_after
+            else:
+                # Full jitter exponential backoff
+                delay = random.uniform(
+                    0, min(self.backoff_max, self.backoff_base * 2**attempt)
+                )
+            logger.warning(
+                f"LeetCode request failed ({error}), retrying in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Parse a Retry-After header given in seconds"""
+        try:
+            return max(0.0, float(value)) if value else None
+        except ValueError:
+            return None
 
     async def validate_username(self, username: str) -> bool:
         """Validate if LeetCode username exists"""
+        found, exists = self.username_cache.get(username)
+        if found:
+            return exists
+
         try:
             query = """
             query userProfile($username: String!) {
@@ -39,30 +186,28 @@ class LeetCodeService:
             """
 
             variables = {"username": username}
-            payload = {"query": query, "variables": variables}
+            data = await self._post(query, variables)
 
-            async with self.session.post(
-                self.base_url,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-            ) as response:
-                data = await response.json()
-
-                if "data" in data and data["data"]["matchedUser"]:
-                    return True
-                return False
+            # Error bodies (4xx, unmatched replays) carry no data, don't cache
+            # them as a missing user. Unknown users come back with a null match
+            if not (isinstance(data, dict) and data.get("data")):
+                raise LeetCodeAPIError(f"Lookup returned no data: {data}")
+            exists = bool(data["data"]["matchedUser"])
+            ttl = self.username_ttl if exists else self.missing_username_ttl
+            self.username_cache.set(username, exists, ttl)
+            return exists
 
         except Exception as e:
             logger.error(f"Error validating username {username}: {e}")
             return False
 
-    async def fetch_random_question(
-        self, used_slugs: List[str]
-    ) -> Optional[Dict[str, Any]]:
-        """Fetch a random LeetCode question that hasn't been used"""
+    async def fetch_question_page(
+        self, skip: int, limit: int
+    ) -> Optional[Tuple[int, List[Dict[str, Any]]]]:
+        """Fetch one page of the question list, returns (total, questions)"""
         try:
             query = """
-            query randomQuestion($categorySlug: String, $limit: Int, $skip: Int, $filters: QuestionListFilterInput) {
+            query questionCatalog($categorySlug: String, $limit: Int, $skip: Int, $filters: QuestionListFilterInput) {
                 questionList(
                     categorySlug: $categorySlug
                     limit: $limit
@@ -71,22 +216,14 @@ class LeetCodeService:
                 ) {
                     total: totalNum
                     questions: data {
-                        acRate
                         difficulty
-                        freqBar
                         frontendQuestionId: questionFrontendId
-                        isFavor
                         paidOnly: isPaidOnly
-                        status
                         title
                         titleSlug
                         topicTags {
-                            name
-                            id
                             slug
                         }
-                        hasSolution
-                        hasVideoSolution
                     }
                 }
             }
@@ -94,43 +231,40 @@ class LeetCodeService:
 
             variables = {
                 "categorySlug": "",
-                "skip": random.randint(0, 2000),
-                "limit": 50,
+                "skip": skip,
+                "limit": limit,
                 "filters": {},
             }
 
-            payload = {"query": query, "variables": variables}
-
-            async with self.session.post(
-                self.base_url,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-            ) as response:
-                data = await response.json()
-                questions = data["data"]["questionList"]["questions"]
-
-                # Filter out paid-only and already used questions
-                available_questions = [
-                    q
-                    for q in questions
-                    if not q["paidOnly"] and q["titleSlug"] not in used_slugs
-                ]
-
-                if not available_questions:
-                    logger.warning("No available questions found, retrying...")
-                    return await self.fetch_random_question(used_slugs)
+            data = await self._post(query, variables)
+            question_list = data["data"]["questionList"]
 
-                selected_question = random.choice(available_questions)
-                return selected_question
+            # Keep only the fields the catalog indexes on
+            questions = [
+                {
+                    "title": q["title"],
+                    "titleSlug": q["titleSlug"],
+                    "difficulty": q["difficulty"],
+                    "frontendQuestionId": q["frontendQuestionId"],
+                    "paidOnly": q["paidOnly"],
+                    "tags": [tag["slug"] for tag in q["topicTags"] or []],
+                }
+                for q in question_list["questions"]
+            ]
+            return question_list["total"], questions
 
         except Exception as e:
-            logger.error(f"Error fetching LeetCode question: {e}")
+            logger.error(f"Error fetching LeetCode question list: {e}")
             return None
 
     async def check_user_submission(
         self, leetcode_username: str, question_slug: str, after_timestamp: int
-    ) -> bool:
-        """Check if user submitted the question after the given timestamp"""
+    ) -> Optional[bool]:
+        """Check if user submitted the question after the given timestamp
+
+        Returns None if LeetCode couldn't be reached, so callers can tell a
+        failed check apart from an unsolved question.
+        """
         try:
             query = """
             query recentAcSubmissions($username: String!) {
@@ -143,30 +277,78 @@ class LeetCodeService:
             """
 
             variables = {"username": leetcode_username}
-            payload = {"query": query, "variables": variables}
+            data = await self._post(query, variables)
+
+            if "data" not in data or not data["data"]["recentAcSubmissionList"]:
+                return False
 
-            async with self.session.post(
-                self.base_url,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-            ) as response:
-                data = await response.json()
+            submissions = data["data"]["recentAcSubmissionList"]
+            return self.solved_after(submissions, question_slug, after_timestamp)
 
-                if "data" not in data or not data["data"]["recentAcSubmissionList"]:
-                    return False
+        except Exception as e:
+            logger.error(f"Error checking submission for {leetcode_username}: {e}")
+            return None
 
-                submissions = data["data"]["recentAcSubmissionList"]
+    async def fetch_recent_submissions(
+        self, usernames: List[str], concurrency: int = 10
+    ) -> Dict[str, Optional[List[Dict[str, Any]]]]:
+        """Fetch recent accepted submissions for many users
 
-                # Check if question was solved after the timestamp
-                for submission in submissions:
-                    if (
-                        submission["titleSlug"] == question_slug
-                        and int(submission["timestamp"]) > after_timestamp
-                    ):
-                        return True
+        Usernames are packed as aliased fields into batched queries of
+        `submission_batch_size`. A user maps to None if their batch failed.
+        """
+        unique = list(dict.fromkeys(usernames))
+        size = self.submission_batch_size
+        batches = [unique[i : i + size] for i in range(0, len(unique), size)]
+        semaphore = asyncio.Semaphore(concurrency)
 
-                return False
+        async def fetch(batch: List[str]):
+            async with semaphore:
+                return await self._fetch_submission_batch(batch)
+
+        results = {}
+        for batch_result in await asyncio.gather(*(fetch(b) for b in batches)):
+            results.update(batch_result)
+        return results
+
+    async def _fetch_submission_batch(
+        self, usernames: List[str]
+    ) -> Dict[str, Optional[List[Dict[str, Any]]]]:
+        """Fetch recent accepted submissions for one batch in a single request"""
+        try:
+            variables = {f"u{i}": username for i, username in enumerate(usernames)}
+            params = ", ".join(f"${alias}: String!" for alias in variables)
+            fields = "\n".join(
+                f"{alias}: recentAcSubmissionList(username: ${alias}, limit: 100) "
+                "{ titleSlug timestamp }"
+                for alias in variables
+            )
+            query = f"query recentAcSubmissionsBatch({params}) {{\n{fields}\n}}"
+
+            data = await self._post(query, variables)
+            if not data.get("data"):
+                raise LeetCodeAPIError(f"No data in response: {data.get('errors')}")
+
+            # Unknown users come back as null, same as having no submissions
+            return {
+                username: data["data"].get(alias) or []
+                for alias, username in zip(variables, usernames)
+            }
 
         except Exception as e:
-            logger.error(f"Error checking submission for {leetcode_username}: {e}")
-            return False
+            logger.error(f"Error fetching submissions for {len(usernames)} users: {e}")
+            return {username: None for username in usernames}
+
+    @staticmethod
+    def solved_after(
+        submissions: List[Dict[str, Any]], question_slug: str, after_timestamp: int
+    ) -> bool:
+        """Check if a submission list solves the question after the timestamp"""
+        for submission in submissions:
+            if (
+                submission["titleSlug"] == question_slug
+                and int(submission["timestamp"]) > after_timestamp
+            ):
+                return True
+
+        return False
@@ -0,0 +1,206 @@
+import bisect
+import functools
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple, Sequence
+
+# Latency buckets in seconds, from cache hits up to slow scoring runs
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Tuple[str, ...], **extra) -> str:
+    pairs = list(zip(names, values)) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """Monotonically increasing value per label set"""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value that can go up and down per label set"""
+
+    def set(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        self._values[key] = value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    """Bucketed observations per label set"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts, sum, count)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+        position = bisect.bisect_left(self.buckets, value)
+        if position < len(counts):
+            counts[position] += 1
+        self._values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the enclosed block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels(self.labels, key, le=bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            inf_labels = _format_labels(self.labels, key, le="+Inf")
+            lines.append(f"{self.name}_bucket{inf_labels} {count}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+def timed(histogram: Histogram, **labels):
+    """Decorator observing how long an async function takes"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """Call `collector()` before each render, to refresh gauges"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+LEETCODE_REQUEST_SECONDS = REGISTRY.register(
+    Histogram(
+        "leetcode_request_duration_seconds",
+        "LeetCode GraphQL request duration including retries",
+        ["operation"],
+    )
+)
+LEETCODE_REQUESTS = REGISTRY.register(
+    Counter(
+        "leetcode_requests_total",
+        "LeetCode GraphQL HTTP attempts by outcome",
+        ["operation", "outcome"],
+    )
+)
+DB_OPERATION_SECONDS = REGISTRY.register(
+    Histogram(
+        "db_operation_duration_seconds",
+        "DatabaseManager method duration",
+        ["method"],
+    )
+)
+DB_QUERY_ERRORS = REGISTRY.register(
+    Counter("db_query_errors_total", "Supabase queries that raised", ["method"])
+)
+COMMAND_SECONDS = REGISTRY.register(
+    Histogram(
+        "discord_command_duration_seconds",
+        "Command invocation duration",
+        ["command", "outcome"],
+    )
+)
+TASK_SECONDS = REGISTRY.register(
+    Histogram(
+        "scheduled_task_duration_seconds",
+        "Scheduled task run duration",
+        ["task"],
+    )
+)
+TASK_ERRORS = REGISTRY.register(
+    Counter("scheduled_task_errors_total", "Scheduled task runs that failed", ["task"])
+)
+USERS_SCORED = REGISTRY.register(
+    Counter("scoring_results_total", "Scoring results by outcome", ["outcome"])
+)
+DISCORD_SEND_SECONDS = REGISTRY.register(
+    Histogram(
+        "discord_fanout_delivery_seconds",
+        "Time from fan-out start until a channel received the message",
+    )
+)
+HTTP_POOL = REGISTRY.register(
+    Gauge("http_client_stat", "LeetCode HTTP client pool counters", ["stat"])
+)
+DB_CACHE = REGISTRY.register(
+    Gauge("db_cache_stat", "DatabaseManager cache counters", ["cache", "stat"])
+)
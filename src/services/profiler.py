@@ -0,0 +1,147 @@
+import cProfile
+import functools
+import os
+import random
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional, Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class InvocationProfile:
+    """Wall time of one command, view or listener split into phases"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self._phase_depth = 0
+
+    def breakdown(self, elapsed: float) -> str:
+        parts = [
+            f"{phase} {seconds * 1000:.0f}ms" for phase, seconds in self.phases.items()
+        ]
+        # Concurrent phases can add up to more than the wall time
+        other = max(0.0, elapsed - sum(self.phases.values()))
+        parts.append(f"other {other * 1000:.0f}ms")
+        return ", ".join(parts)
+
+
+_current_profile: ContextVar[Optional[InvocationProfile]] = ContextVar(
+    "invocation_profile", default=None
+)
+
+
+@contextmanager
+def phase(name: str):
+    """Attribute the enclosed time to a phase of the current invocation"""
+    profile = _current_profile.get()
+    # Only the outermost phase counts, so nested calls aren't double counted
+    if profile is None or profile._phase_depth:
+        yield
+        return
+
+    started = time.perf_counter()
+    profile._phase_depth += 1
+    try:
+        yield
+    finally:
+        profile._phase_depth -= 1
+        profile.phases[name] = (
+            profile.phases.get(name, 0.0) + time.perf_counter() - started
+        )
+
+
+def instrument(obj, attr: str, name: str):
+    """Wrap a coroutine method on an object so its calls count as a phase
+
+    Safe to call again on the same object, e.g. a shared module-level adapter
+    when several clients start in one process, the method is wrapped once.
+    """
+    method = getattr(obj, attr)
+    if getattr(method, "__instrumented__", False):
+        return
+
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        with phase(name):
+            return await method(*args, **kwargs)
+
+    wrapper.__instrumented__ = True
+    setattr(obj, attr, wrapper)
+
+
+def profiled(name: str):
+    """Profile a view, modal or listener method on an object with `self.bot`"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            async with self.bot.profiler.profile(name):
+                return await func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class CommandProfiler:
+    """Logs slow invocations and samples cProfile captures of them to disk"""
+
+    def __init__(
+        self,
+        slow_threshold: float = 1.0,
+        sample_rate: float = 0.0,
+        profile_dir: str = "data/profiles",
+    ):
+        self.slow_threshold = slow_threshold
+        self.sample_rate = sample_rate
+        self.profile_dir = profile_dir
+        # Only one cProfile can be active per thread
+        self._capturing = False
+
+    @asynccontextmanager
+    async def profile(self, name: str):
+        """Time the enclosed invocation and report it if slow"""
+        profile = InvocationProfile(name)
+        token = _current_profile.set(profile)
+
+        profiler = None
+        if not self._capturing and random.random() < self.sample_rate:
+            # Captures everything the loop runs meanwhile, not just this call
+            profiler = cProfile.Profile()
+            self._capturing = True
+            profiler.enable()
+
+        try:
+            yield profile
+        finally:
+            if profiler:
+                profiler.disable()
+                self._capturing = False
+            _current_profile.reset(token)
+
+            elapsed = time.perf_counter() - profile.started
+            if elapsed >= self.slow_threshold:
+                logger.warning(
+                    f"Slow {name}: {elapsed * 1000:.0f}ms "
+                    f"({profile.breakdown(elapsed)})"
+                )
+                if profiler:
+                    self._dump(profiler, name)
+
+    def _dump(self, profiler: cProfile.Profile, name: str):
+        """Write a capture for offline analysis with pstats or snakeviz"""
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+            safe_name = "".join(c if c.isalnum() else "_" for c in name)
+            path = os.path.join(self.profile_dir, f"{safe_name}-{stamp}.prof")
+            profiler.dump_stats(path)
+            logger.info(f"Saved profile of {name} to {path}")
+        except Exception as e:
+            logger.error(f"Error saving profile: {e}")
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import os
+import random
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+import logging
+from src.services.leetcode_services import LeetCodeService
+
+logger = logging.getLogger(__name__)
+
+
+class _SlugPool:
+    """Set of slugs supporting O(1) add, discard and random choice"""
+
+    def __init__(self):
+        self._slugs: List[str] = []
+        self._positions: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._slugs)
+
+    def add(self, slug: str):
+        if slug not in self._positions:
+            self._positions[slug] = len(self._slugs)
+            self._slugs.append(slug)
+
+    def discard(self, slug: str):
+        position = self._positions.pop(slug, None)
+        if position is None:
+            return
+        # Swap the last slug into the freed position
+        last = self._slugs.pop()
+        if position < len(self._slugs):
+            self._slugs[position] = last
+            self._positions[last] = position
+
+    def choice(self) -> Optional[str]:
+        return random.choice(self._slugs) if self._slugs else None
+
+
+class QuestionCatalog:
+    """Locally cached LeetCode question list indexed for daily picks"""
+
+    def __init__(
+        self,
+        leetcode_service: LeetCodeService,
+        path: str,
+        page_size: int = 100,
+    ):
+        self.leetcode_service = leetcode_service
+        self.path = path
+        self.page_size = page_size
+        self.questions: Dict[str, Dict[str, Any]] = {}
+        self._excluded: set = set()
+        # Pools only hold free questions that haven't been excluded
+        self._pools: Dict[Tuple[str, str], _SlugPool] = {}
+        self._load()
+
+    def _load(self):
+        """Load the catalog from disk if it exists"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for question in json.load(f)["questions"]:
+                    self._index(question)
+            logger.info(f"Loaded {len(self.questions)} questions from catalog")
+        except Exception as e:
+            logger.error(f"Error loading question catalog: {e}")
+
+    def _save(self):
+        """Write the catalog to disk"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"questions": list(self.questions.values())}, f)
+        os.replace(tmp_path, self.path)
+
+    def _pool_keys(self, question: Dict[str, Any]) -> List[Tuple[str, str]]:
+        """Pools keyed by (difficulty, tag), with "" meaning any"""
+        difficulty = question["difficulty"]
+        keys = [("", ""), (difficulty, "")]
+        for tag in question["tags"]:
+            keys.extend([("", tag), (difficulty, tag)])
+        return keys
+
+    def _index(self, question: Dict[str, Any]):
+        """Add a question to the catalog and its indexes"""
+        slug = question["titleSlug"]
+        if slug in self.questions:
+            self._unindex(self.questions[slug])
+        self.questions[slug] = question
+        if question["paidOnly"] or slug in self._excluded:
+            return
+        for key in self._pool_keys(question):
+            self._pools.setdefault(key, _SlugPool()).add(slug)
+
+    def _unindex(self, question: Dict[str, Any]):
+        for key in self._pool_keys(question):
+            pool = self._pools.get(key)
+            if pool:
+                pool.discard(question["titleSlug"])
+
+    async def refresh(self) -> int:
+        """Fetch questions added since the last refresh, returns how many"""
+        added = 0
+        skip = len(self.questions)
+        while True:
+            page = await self.leetcode_service.fetch_question_page(skip, self.page_size)
+            if page is None:
+                break
+
+            total, questions = page
+            for question in questions:
+                if question["titleSlug"] not in self.questions:
+                    added += 1
+                self._index(question)
+
+            skip += len(questions)
+            if not questions or skip >= total:
+                break
+
+        if added:
+            await asyncio.to_thread(self._save)
+            logger.info(f"Question catalog refreshed: {added} new questions")
+        return added
+
+    def exclude(self, slugs: Iterable[str]):
+        """Remove questions from the pool of pickable questions"""
+        for slug in slugs:
+            if slug in self._excluded:
+                continue
+            self._excluded.add(slug)
+            question = self.questions.get(slug)
+            if question:
+                self._unindex(question)
+
+    def available_count(
+        self, difficulty: Optional[str] = None, tag: Optional[str] = None
+    ) -> int:
+        """Number of pickable questions matching the filter"""
+        pool = self._pools.get((difficulty or "", tag or ""))
+        return len(pool) if pool else 0
+
+    def pick(
+        self, difficulty: Optional[str] = None, tag: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Pick a random free, unused question matching the filter"""
+        pool = self._pools.get((difficulty or "", tag or ""))
+        slug = pool.choice() if pool else None
+        return self.questions[slug] if slug else None
@@ -0,0 +1,41 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Async token bucket allowing `rate` acquisitions per second on average
+
+    Up to `burst` tokens can be spent at once after an idle period.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        # The lock keeps waiters in FIFO order
+        async with self._lock:
+            self._refill()
+            # A pause() while sleeping drains the bucket again, so recheck
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+    def pause(self, seconds: float):
+        """Drain the bucket so no request goes out for `seconds`
+
+        Pauses overlap rather than add up, so many requests throttled with the
+        same Retry-After stop the bucket for `seconds`, not a multiple of it.
+        """
+        self._refill()
+        self._tokens = min(self._tokens, -seconds * self.rate)
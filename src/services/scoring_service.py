@@ -0,0 +1,93 @@
+import asyncio
+from typing import Optional, Dict, Any, List, Tuple
+import logging
+from src.database.database_manager import DatabaseManager
+from src.services.leetcode_services import LeetCodeService
+from src.services.leaderboard_cache import LeaderboardCache
+from src.services.submission_snapshot import SubmissionSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Questions must be solved within 24 hours of being sent to score
+SOLVE_WINDOW_SECONDS = 24 * 60 * 60
+
+
+class ScoringService:
+    """Scores daily question submissions for all registered users"""
+
+    def __init__(
+        self,
+        db: DatabaseManager,
+        leetcode_service: LeetCodeService,
+        daily_points: int = 5,
+        concurrency: int = 20,
+        leaderboard: Optional[LeaderboardCache] = None,
+    ):
+        self.db = db
+        self.leetcode_service = leetcode_service
+        self.daily_points = daily_points
+        self.concurrency = concurrency
+        self.leaderboard = leaderboard
+
+    async def score_question(self, question: Dict[str, Any]) -> Dict[str, int]:
+        """Check every user's submission for a question and award points"""
+        return await self.score_questions([question])
+
+    async def score_questions(self, questions: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Score several questions, fetching each user's submissions once"""
+        stats = {"questions": len(questions), "checked": 0, "solved": 0, "errors": 0}
+        if not questions:
+            return stats
+
+        users = await self.db.get_all_users()
+        if not users:
+            return stats
+
+        # Fetch every user's recent submissions in batched requests
+        snapshot = SubmissionSnapshot(self.leetcode_service, self.concurrency)
+        await snapshot.load([user["leetcode_username"] for user in users])
+
+        writes = []
+        for question in questions:
+            results = [
+                (
+                    user,
+                    snapshot.solved_after(
+                        user["leetcode_username"],
+                        question["question_slug"],
+                        question["timestamp"],
+                        question["timestamp"] + SOLVE_WINDOW_SECONDS,
+                    ),
+                )
+                for user in users
+            ]
+
+            # Users whose check failed are left unscored, not marked unsolved
+            checked = [(user, solved) for user, solved in results if solved is not None]
+            stats["checked"] += len(checked)
+            stats["solved"] += sum(1 for _, solved in checked if solved)
+            stats["errors"] += len(results) - len(checked)
+            writes.append(self._write_results(question, checked))
+
+        if stats["errors"]:
+            logger.warning(
+                f"Could not check {stats['errors']} results against LeetCode"
+            )
+
+        # Write everything once all checks are in
+        await asyncio.gather(*writes)
+        return stats
+
+    async def _write_results(
+        self, question: Dict[str, Any], results: List[Tuple[Dict[str, Any], bool]]
+    ):
+        """Persist submission results and score updates in one transaction"""
+        # Only solves not already recorded come back, so reruns award nothing
+        awarded = await self.db.record_results(
+            question["id"],
+            [(user["discord_id"], solved) for user, solved in results],
+            self.daily_points,
+        )
+
+        if awarded and self.leaderboard:
+            await self.leaderboard.add_points(awarded, self.daily_points)
@@ -0,0 +1,64 @@
+import bisect
+from typing import Optional, Dict, List
+import logging
+from src.services.leetcode_services import LeetCodeService
+
+logger = logging.getLogger(__name__)
+
+
+class SubmissionSnapshot:
+    """Recent accepted submissions per user, fetched once per scoring cycle"""
+
+    def __init__(self, leetcode_service: LeetCodeService, concurrency: int = 10):
+        self.leetcode_service = leetcode_service
+        self.concurrency = concurrency
+        # username -> question slug -> sorted accepted timestamps
+        self._accepted: Dict[str, Dict[str, List[int]]] = {}
+
+    def __contains__(self, username: str) -> bool:
+        return username in self._accepted
+
+    async def load(self, usernames: List[str]):
+        """Fetch users not already in the snapshot
+
+        Users whose fetch fails are left out, so a later load retries them.
+        """
+        missing = [username for username in usernames if username not in self]
+        if not missing:
+            return
+
+        submissions = await self.leetcode_service.fetch_recent_submissions(
+            missing, self.concurrency
+        )
+        for username, recent in submissions.items():
+            if recent is None:
+                continue
+            accepted: Dict[str, List[int]] = {}
+            for submission in recent:
+                accepted.setdefault(submission["titleSlug"], []).append(
+                    int(submission["timestamp"])
+                )
+            for timestamps in accepted.values():
+                timestamps.sort()
+            self._accepted[username] = accepted
+
+    def solved_after(
+        self,
+        username: str,
+        question_slug: str,
+        after_timestamp: int,
+        before_timestamp: Optional[int] = None,
+    ) -> Optional[bool]:
+        """Check a loaded user solved after one timestamp and by another
+
+        Returns None if the user couldn't be fetched.
+        """
+        accepted = self._accepted.get(username)
+        if accepted is None:
+            return None
+        timestamps = accepted.get(question_slug, [])
+        # The first accept after the question was sent decides it
+        index = bisect.bisect_right(timestamps, after_timestamp)
+        if index == len(timestamps):
+            return False
+        return before_timestamp is None or timestamps[index] <= before_timestamp
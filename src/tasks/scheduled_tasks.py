@@ -1,281 +1,253 @@
 import asyncio
-from datetime import datetime, timedelta
+import discord
+from datetime import datetime, time, timedelta, timezone
 from discord.ext import tasks
 import logging
-from typing import TYPE_CHECKING
+from typing import Optional, Dict, TYPE_CHECKING
+from src.services.metrics import TASK_SECONDS, TASK_ERRORS, USERS_SCORED, timed
 
 if TYPE_CHECKING:
     from src.bot.leetcode_bot import LeetCodeBot
 
 logger = logging.getLogger(__name__)
 
+# How long other shard processes wait for shard 0 to pick the daily question
+DAILY_QUESTION_POLLS = 20
+DAILY_QUESTION_POLL_INTERVAL = 30
+
 
 class ScheduledTasks:
     """Handles all scheduled tasks for the bot"""
 
     def __init__(self, bot: "LeetCodeBot"):
         self.bot = bot
+        self._scoring_lock = asyncio.Lock()
+        self._catch_up = None
+        self.last_scoring_run: Optional[datetime] = None
+        self.last_scoring_stats: Optional[Dict[str, int]] = None
+        self._latest_submission_id: Optional[int] = None
 
     def start_all_tasks(self):
-        """Start all scheduled tasks"""
-        self.daily_question_task.start()
-        self.check_submissions_task.start()
+        """Start the tasks this process runs, safe to call again on reconnect"""
+        if self.bot.leaderboard and not self.refresh_leaderboard_task.is_running():
+            self.refresh_leaderboard_task.start()
+        if (
+            self.bot.leaderboard
+            and not (self.bot.runs_scheduled_jobs and self.bot.runs_global_jobs)
+            and not self.watch_scores_task.is_running()
+        ):
+            # Another process scores questions, pick its results up promptly
+            self.watch_scores_task.start()
+        if not self.bot.runs_scheduled_jobs:
+            return
+
+        if not self.daily_question_task.is_running():
+            self.daily_question_task.start()
+        if not self.bot.runs_global_jobs:
+            return
+
+        if not self.refresh_catalog_task.is_running():
+            self.refresh_catalog_task.start()
+        if not self.check_submissions_task.is_running():
+            self.check_submissions_task.start()
+
+        # Score anything missed while the bot was offline
+        if self._catch_up is None:
+            self._catch_up = asyncio.create_task(self.score_pending_questions())
 
     def stop_all_tasks(self):
         """Stop all scheduled tasks"""
+        if self.refresh_catalog_task.is_running():
+            self.refresh_catalog_task.cancel()
+        if self.refresh_leaderboard_task.is_running():
+            self.refresh_leaderboard_task.cancel()
+        if self.watch_scores_task.is_running():
+            self.watch_scores_task.cancel()
         if self.daily_question_task.is_running():
             self.daily_question_task.cancel()
         if self.check_submissions_task.is_running():
             self.check_submissions_task.cancel()
 
-    @tasks.loop(hours=24)
-    async def daily_question_task(self):
-        """Send daily question at 12 AM UTC"""
+    @tasks.loop(hours=12)
+    @timed(TASK_SECONDS, task="refresh_catalog")
+    async def refresh_catalog_task(self):
+        """Pull newly published questions into the local catalog"""
         try:
-            # Get used question slugs
-            used_slugs = self.bot.db.get_used_question_slugs()
+            await self.bot.question_catalog.refresh()
+        except Exception as e:
+            TASK_ERRORS.inc(task="refresh_catalog")
+            logger.error(f"Error refreshing question catalog: {e}")
 
-            # Fetch random question
-            question = await self.bot.leetcode_service.fetch_random_question(used_slugs)
-            if not question:
-                logger.error("Failed to fetch question")
+    @tasks.loop(hours=1)
+    @timed(TASK_SECONDS, task="refresh_leaderboard")
+    async def refresh_leaderboard_task(self):
+        """Rebuild the leaderboard cache to pick up changes made outside the bot"""
+        try:
+            await self.bot.leaderboard.build()
+        except Exception as e:
+            TASK_ERRORS.inc(task="refresh_leaderboard")
+            logger.error(f"Error refreshing leaderboard cache: {e}")
+
+    @tasks.loop(minutes=5)
+    async def watch_scores_task(self):
+        """Rebuild the leaderboard cache once another process records results"""
+        try:
+            latest = await self.bot.db.get_latest_submission_id()
+            if latest is None:
                 return
+            # Results and their points are written in one transaction, so new
+            # submissions mean the scores are already in the users table
+            if self._latest_submission_id not in (None, latest):
+                # !profile reads the user cache, keep it in step with !rank
+                self.bot.db.invalidate_users()
+                await self.bot.leaderboard.build()
+            self._latest_submission_id = latest
+        except Exception as e:
+            TASK_ERRORS.inc(task="watch_scores")
+            logger.error(f"Error watching for new scores: {e}")
 
-            # Save question to database
-            daily_question = self.bot.db.save_daily_question(
-                question["titleSlug"], question["title"], question["difficulty"]
-            )
-            if not daily_question:
-                logger.error("Failed to save daily question")
+    @tasks.loop(time=time(hour=0, tzinfo=timezone.utc))
+    @timed(TASK_SECONDS, task="daily_question")
+    async def daily_question_task(self):
+        """Send daily question at 12 AM UTC"""
+        try:
+            if self.bot.runs_global_jobs:
+                question = await self._pick_daily_question()
+            else:
+                question = await self._wait_for_daily_question()
+            if not question:
                 return
 
-            # Send question to all groups
+            # Send question to all groups on this process's shards
             await self._send_question_to_groups(question)
             logger.info(f"Daily question sent: {question['title']}")
 
         except Exception as e:
+            TASK_ERRORS.inc(task="daily_question")
             logger.error(f"Error in daily question task: {e}")
 
-    @tasks.loop(hours=24)
+    async def _pick_daily_question(self) -> Optional[Dict]:
+        """Pick an unused question from the catalog and save it"""
+        catalog = self.bot.question_catalog
+        if not catalog.questions:
+            await catalog.refresh()
+
+        # Exclude used questions and pick from the local catalog
+        used_slugs = await self.bot.db.get_used_question_slugs()
+        catalog.exclude(used_slugs)
+        question = catalog.pick()
+        if not question:
+            logger.error("No unused questions left in the catalog")
+            return None
+
+        # Save question to database
+        daily_question = await self.bot.db.save_daily_question(
+            question["titleSlug"], question["title"], question["difficulty"]
+        )
+        if not daily_question:
+            logger.error("Failed to save daily question")
+            return None
+
+        catalog.exclude([question["titleSlug"]])
+        return question
+
+    async def _wait_for_daily_question(self) -> Optional[Dict]:
+        """Wait for the shard 0 process to save today's question"""
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        for _ in range(DAILY_QUESTION_POLLS):
+            saved = await self.bot.db.get_latest_daily_question(today)
+            if saved:
+                return {
+                    "title": saved["question_title"],
+                    "titleSlug": saved["question_slug"],
+                    "difficulty": saved["difficulty"],
+                }
+            await asyncio.sleep(DAILY_QUESTION_POLL_INTERVAL)
+
+        logger.error("Today's question was never saved by the shard 0 process")
+        return None
+
+    @tasks.loop(time=time(hour=1, tzinfo=timezone.utc))
     async def check_submissions_task(self):
         """Check submissions 24 hours after question was sent"""
-        try:
-            # Get yesterday's question
-            yesterday = datetime.utcnow() - timedelta(days=1)
-            # This would need a proper query method in DatabaseManager
-            # For now, this is a placeholder
+        await self.score_pending_questions()
+
+    @timed(TASK_SECONDS, task="check_submissions")
+    async def score_pending_questions(self):
+        """Score every unscored question whose 24 hour window has closed
+
+        Covers days missed while the bot was down, all in one pass per user.
+        """
+        async with self._scoring_lock:
+            try:
+                now = datetime.utcnow()
+                questions = await self.bot.db.get_unscored_daily_questions(
+                    now - timedelta(days=self.bot.config.catch_up_days),
+                    now - timedelta(hours=24),
+                )
+                if not questions:
+                    logger.info("No daily questions waiting to be scored")
+                    self.last_scoring_run = now
+                    return
 
-            # Get all users and check their submissions
-            # Implementation would go here
-            logger.info("Submissions checked and scores updated")
+                # Check all users' submissions and update scores
+                stats = await self.bot.scoring_service.score_questions(questions)
+                self.last_scoring_run = now
+                self.last_scoring_stats = stats
+                USERS_SCORED.inc(stats["solved"], outcome="solved")
+                USERS_SCORED.inc(stats["checked"] - stats["solved"], outcome="unsolved")
+                USERS_SCORED.inc(stats["errors"], outcome="error")
+                logger.info(
+                    f"Submissions checked and scores updated for "
+                    f"{stats['questions']} questions: "
+                    f"{stats['solved']}/{stats['checked']} solved"
+                )
 
-        except Exception as e:
-            logger.error(f"Error checking submissions: {e}")
+            except Exception as e:
+                TASK_ERRORS.inc(task="check_submissions")
+                logger.error(f"Error checking submissions: {e}")
 
     async def _send_question_to_groups(self, question):
-        """Send daily question to all group channels"""
+        """Send daily question to the group channels of every guild we serve"""
         try:
-            groups = self.bot.db.get_all_groups()
-            guild = self.bot.get_guild(self.bot.config.main_guild_id)
-
-            if not guild:
-                logger.error("Guild not found")
-                return
-
-            for group in groups:
-                if group.get("channel_id"):
-                    channel = guild.get_channel(int(group["channel_id"]))
-                    if channel:
-                        embed = discord.Embed(
-                            title="🧠 Daily LeetCode Challenge",
-                            description=f"**{question['title']}**\n\nDifficulty: {question['difficulty']}",
-                            color=0x00FF00,
-                            url=f"https://leetcode.com/problems/{question['titleSlug']}/",
-                        )
-                        embed.add_field(
-                            name="⏰ Deadline", value="24 hours from now", inline=False
-                        )
-                        embed.add_field(
-                            name="🎯 Points",
-                            value=f"+{self.bot.config.daily_points} points for solving",
-                            inline=False,
-                        )
-                        embed.set_footer(text="Good luck team! 💪")
-
-                        await channel.send("@everyone", embed=embed)
+            groups = await self.bot.db.get_all_groups()
+            channels_by_shard = self.bot.group_channels(groups)
+
+            # Build the embed once, each shard's channels are sent to
+            # concurrently with their own budget so a big shard can't starve others
+            embed = self._build_question_embed(question)
+            await asyncio.gather(
+                *(
+                    self.bot.fanout.send(channels, "@everyone", embed=embed)
+                    for channels in channels_by_shard.values()
+                )
+            )
         except Exception as e:
             logger.error(f"Error sending question to groups: {e}")
 
+    def _build_question_embed(self, question) -> discord.Embed:
+        """Build the daily question announcement"""
+        embed = discord.Embed(
+            title="🧠 Daily LeetCode Challenge",
+            description=f"**{question['title']}**\n\nDifficulty: {question['difficulty']}",
+            color=0x00FF00,
+            url=f"https://leetcode.com/problems/{question['titleSlug']}/",
+        )
+        embed.add_field(name="⏰ Deadline", value="24 hours from now", inline=False)
+        embed.add_field(
+            name="🎯 Points",
+            value=f"+{self.bot.config.daily_points} points for solving",
+            inline=False,
+        )
+        embed.set_footer(text="Good luck team! 💪")
+        return embed
+
     @daily_question_task.before_loop
     async def before_daily_question(self):
-        """Wait until bot is ready and calculate time until midnight UTC"""
+        """Wait until bot is ready, the loop itself runs at 12 AM UTC"""
         await self.bot.wait_until_ready()
-        now = datetime.utcnow()
-        next_midnight = (now + timedelta(days=1)).replace(
-            hour=0, minute=0, second=0, microsecond=0
-        )
-        seconds_until_midnight = (next_midnight - now).total_seconds()
-        await asyncio.sleep(seconds_until_midnight)
 
     @check_submissions_task.before_loop
     async def before_check_submissions(self):
-        """Wait until bot is ready and start checking submissions 1 hour after daily questions"""
+        """Wait until bot is ready, the loop itself runs at 1 AM UTC"""
         await self.bot.wait_until_ready()
-        now = datetime.utcnow()
-        next_check_time = (now + timedelta(days=1)).replace(
-            hour=1, minute=0, second=0, microsecond=0
-        )
-        seconds_until_check = (next_check_time - now).total_seconds()
-        await asyncio.sleep(seconds_until_check)
-
-
-# ====================================================
-# commands/user_commands.py
-import discord
-from discord.ext import commands
-import logging
-from typing import TYPE_CHECKING
-
-if TYPE_CHECKING:
-    from bot.leetcode_bot import LeetCodeBot
-
-logger = logging.getLogger(__name__)
-
-
-class UserCommands(commands.Cog):
-    """Commands related to user operations"""
-
-    def __init__(self, bot: "LeetCodeBot"):
-        self.bot = bot
-
-    @commands.command(name="update_username")
-    async def update_username(self, ctx: commands.Context, new_username: str):
-        """Update LeetCode username"""
-        try:
-            user_id = str(ctx.author.id)
-
-            # Validate new username
-            is_valid = await self.bot.leetcode_service.validate_username(new_username)
-            if not is_valid:
-                await ctx.send(
-                    f"❌ The Leetcode username '{new_username}' doesn't exist or is invalid."
-                )
-                return
-
-            # Update username
-            success = self.bot.db.update_user_username(user_id, new_username)
-            if success:
-                await ctx.send(
-                    f"✅ Successfully updated your Leetcode username to: `{new_username}`"
-                )
-            else:
-                await ctx.send(
-                    "❌ You're not registered yet. Please complete registration first when you joined the server."
-                )
-
-        except Exception as e:
-            logger.error(f"Error updating username: {e}")
-            await ctx.send("❌ Failed to update username. Please try again.")
-
-    @commands.command(name="profile")
-    async def show_profile(self, ctx: commands.Context):
-        """Show user profile"""
-        try:
-            user_id = str(ctx.author.id)
-            user_data = self.bot.db.get_user(user_id)
-
-            if not user_data:
-                await ctx.send(
-                    "You're not registered yet. Please complete registration first when you joined the server."
-                )
-                return
-
-            embed = discord.Embed(
-                title=f"Profile: {ctx.author.display_name}", color=0x7289DA
-            )
-            embed.add_field(
-                name="LeetCode Username",
-                value=user_data["leetcode_username"],
-                inline=True,
-            )
-            embed.add_field(
-                name="Monthly Score",
-                value=f"{user_data['monthly_score']} points",
-                inline=True,
-            )
-            embed.add_field(
-                name="Weekly Score",
-                value=f"{user_data['weekly_score']} points",
-                inline=True,
-            )
-            embed.set_thumbnail(
-                url=ctx.author.avatar.url if ctx.author.avatar else None
-            )
-
-            await ctx.send(embed=embed)
-
-        except Exception as e:
-            logger.error(f"Error showing profile: {e}")
-            await ctx.send("Failed to fetch profile.")
-
-    @commands.command(name="leaderboard")
-    async def show_leaderboard(self, ctx: commands.Context, type_arg: str = "monthly"):
-        """Show leaderboard (monthly/weekly)"""
-        try:
-            if type_arg.lower() == "weekly":
-                # Show group weekly leaderboard
-                user_id = str(ctx.author.id)
-                user_group = self.bot.db.get_user_group(user_id)
-
-                if not user_group:
-                    await ctx.send(
-                        "You're not in any group yet. Please complete registration first."
-                    )
-                    return
-
-                users = self.bot.db.get_group_weekly_leaderboard(user_group["id"])
-                embed = discord.Embed(
-                    title="🏆 Weekly Group Leaderboard", color=0xFFD700
-                )
-                score_field = "weekly_score"
-            else:
-                # Show monthly global leaderboard
-                users = self.bot.db.get_monthly_leaderboard(
-                    self.bot.config.leaderboard_limit
-                )
-                embed = discord.Embed(
-                    title="🌟 Monthly Global Leaderboard", color=0xFF6B6B
-                )
-                score_field = "monthly_score"
-
-            if not users:
-                embed.add_field(name="No data", value="No users found", inline=False)
-            else:
-                leaderboard_text = ""
-                for i, user in enumerate(users, 1):
-                    score = user[score_field]
-                    discord_user = self.bot.get_user(int(user["discord_id"]))
-                    username = (
-                        discord_user.display_name
-                        if discord_user
-                        else user["leetcode_username"]
-                    )
-
-                    medal = (
-                        "🥇"
-                        if i == 1
-                        else "🥈"
-                        if i == 2
-                        else "🥉"
-                        if i == 3
-                        else f"{i}."
-                    )
-                    leaderboard_text += f"{medal} **{username}** - {score} points\n"
-
-                embed.add_field(name="Rankings", value=leaderboard_text, inline=False)
-
-            await ctx.send(embed=embed)
-
-        except Exception as e:
-            logger.error(f"Error showing leaderboard: {e}")
-            await ctx.send("Failed to fetch leaderboard.")
@@ -1,6 +1,7 @@
 import discord
 from typing import TYPE_CHECKING
 import logging
+from src.services.profiler import profiled
 
 if TYPE_CHECKING:
     from src.bot.leetcode_bot import LeetCodeBot
@@ -23,6 +24,7 @@ class LeetCodeUsernameModal(discord.ui.Modal, title="Welcome to Leetcode Buddy!
         max_length=50,
     )
 
+    @profiled("modal registration")
     async def on_submit(self, interaction: discord.Interaction):
         try:
             await interaction.response.defer(ephemeral=True)
@@ -39,32 +41,28 @@ class LeetCodeUsernameModal(discord.ui.Modal, title="Welcome to Leetcode Buddy!
                 return
 
             # Check if user already exists
-            existing_user = self.bot.db.get_user(user_id)
-            if existing_user:
-                await interaction.followup.send(
-                    "You're already registered! Welcome back! 🎉", ephemeral=True
-                )
-                return
-
-            # Create new user
-            user_data = self.bot.db.create_user(user_id, username)
-            if not user_data:
-                await interaction.followup.send(
-                    "❌ Registration failed. Please try again or contact an admin.",
-                    ephemeral=True,
-                )
-                return
-
-            # Get guild
-            guild = self.bot.get_guild(self.bot.config.main_guild_id)
+            existing_user = await self.bot.db.get_user(user_id)
+            if not existing_user:
+                # Create new user
+                user_data = await self.bot.db.create_user(user_id, username)
+                if not user_data:
+                    await interaction.followup.send(
+                        "❌ Registration failed. Please try again or contact an admin.",
+                        ephemeral=True,
+                    )
+                    return
+                self.bot.leaderboard.upsert_user(user_data)
+
+            # Groups belong to the server the member joined
+            guild = self.bot.get_guild(self.user.guild.id)
             if not guild:
                 await interaction.followup.send(
                     "❌ Server not found. Please contact admin.", ephemeral=True
                 )
                 return
 
-            # Assign user to a group
-            group_info = await self.bot.group_service.assign_user_to_group(
+            # Assign user to a group, registered users may have none here yet
+            group_info = await self.bot.group_service.ensure_user_group(
                 self.user, guild
             )
             if not group_info:
@@ -72,6 +70,17 @@ class LeetCodeUsernameModal(discord.ui.Modal, title="Welcome to Leetcode Buddy!
                     "❌ Failed to assign to group. Please try again.", ephemeral=True
                 )
                 return
+            self.bot.leaderboard.set_user_group(
+                user_id, str(guild.id), group_info["id"]
+            )
+
+            if existing_user:
+                await interaction.followup.send(
+                    f"You're already registered! Welcome back! 🎉 "
+                    f"Your group here is {group_info['name']}.",
+                    ephemeral=True,
+                )
+                return
 
             # Send success message
             embed = discord.Embed(
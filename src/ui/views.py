@@ -1,6 +1,7 @@
 import discord
 from typing import TYPE_CHECKING
 from src.ui.modals import LeetCodeUsernameModal
+from src.services.profiler import profiled
 
 
 if TYPE_CHECKING:
@@ -20,6 +21,7 @@ class WelcomeView(discord.ui.View):
         style=discord.ButtonStyle.primary,
         emoji="📝",
     )
+    @profiled("view register_button")
     async def register_button(
         self, interaction: discord.Interaction, button: discord.ui.Button
     ):
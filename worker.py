@@ -0,0 +1,31 @@
+import logging
+from dotenv import load_dotenv
+
+from src.config.settings import BotConfig
+from src.bot.scheduler_worker import SchedulerWorker
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Entry point for the scheduler worker, run alongside main.py
+
+    Set RUN_SCHEDULED_JOBS=false on the bot so the jobs only run here.
+    """
+    try:
+        config = BotConfig()
+        worker = SchedulerWorker(config)
+        worker.run()
+
+    except Exception as e:
+        logger.error(f"Failed to start scheduler worker: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()